@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+WhatsApp Chat Parser benchmark
+Generates synthetic chat exports and times the line-by-line and block-based parsers on them.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from whatsapp_parser import export_data, load_chat, parse_whatsapp_chat, parse_whatsapp_chat_fast
+
+
+# Message header of each synthetic export format, filled from a timestamp in seconds and an author
+HEADERS = {
+    'ios': lambda s, author: f"[{(s // 86400) % 28 + 1:02d}/03/2024, "
+                             f"{(s // 3600) % 24:02d}:{(s // 60) % 60:02d}:{s % 60:02d}] {author}: ",
+    'ios-12h': lambda s, author: f"[3/{(s // 86400) % 28 + 1}/24, "
+                                 f"{(s // 3600) % 12 or 12}:{(s // 60) % 60:02d}:{s % 60:02d}\u202f"
+                                 f"{'PM' if (s // 3600) % 24 >= 12 else 'AM'}] {author}: ",
+    'android': lambda s, author: f"{(s // 86400) % 28 + 1:02d}/03/2024 "
+                                 f"{(s // 3600) % 24:02d}:{(s // 60) % 60:02d} - {author}: ",
+    'android-12h': lambda s, author: f"3/{(s // 86400) % 28 + 1}/24, "
+                                     f"{(s // 3600) % 12 or 12}:{(s // 60) % 60:02d} "
+                                     f"{'PM' if (s // 3600) % 24 >= 12 else 'AM'} - {author}: ",
+}
+
+
+AUTHORS = ['João Silva', 'Maria Souza', 'Dr. Pedro Alves', '.', 'Escritório Central']
+WORDS = ['prazo', 'audiência', 'processo', 'petição', 'cliente', 'ok', 'amanhã', 'R$ 1.500,00', 'documento', 'enviado']
+
+
+def write_synthetic_chat(path, num_lines, multiline_ratio=0.2, seed=42, chat_format='ios'):
+    """
+    Write a chat export with num_lines lines to path.
+
+    Args:
+        path: Output .txt file
+        num_lines: Total number of lines (headers plus continuation lines)
+        multiline_ratio: Fraction of lines that continue the previous message
+        seed: Random seed, so runs are comparable
+        chat_format: Export format, a key of HEADERS
+    """
+    header = HEADERS[chat_format]
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(num_lines):
+            text = ' '.join(rng.choices(WORDS, k=rng.randint(1, 12)))
+            if i and rng.random() < multiline_ratio:
+                file.write(f"{text}\n")
+            else:
+                file.write(f"{header(i // 3, rng.choice(AUTHORS))}{text}\n")
+
+
+def time_parser(parse, path):
+    start = time.perf_counter()
+    df = parse(path)
+    return time.perf_counter() - start, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the WhatsApp chat parsers on a synthetic export')
+    parser.add_argument('--lines', type=int, default=5_000_000, help='Lines in the synthetic chat (default: 5,000,000)')
+    parser.add_argument('--skip-slow', action='store_true', help='Only time the block-based parser')
+    parser.add_argument('--reload', action='store_true', help='Also time reloading the parsed chat from Parquet/Feather')
+    parser.add_argument(
+        '--formats',
+        nargs='+',
+        choices=list(HEADERS),
+        default=['ios'],
+        help=f'Export formats to benchmark, one synthetic chat each (default: ios; available: {", ".join(HEADERS)})'
+    )
+    args = parser.parse_args()
+
+    for chat_format in args.formats:
+        print(f"=== {chat_format} ===")
+        benchmark_format(chat_format, args)
+        print()
+
+
+def benchmark_format(chat_format, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic_chat.txt')
+        print(f"Generating synthetic chat with {args.lines:,} lines...")
+        write_synthetic_chat(path, args.lines, chat_format=chat_format)
+        print(f"File size: {os.path.getsize(path) / (1024 * 1024):.1f} MB\n")
+
+        fast_time, df_fast = time_parser(parse_whatsapp_chat_fast, path)
+        print(f"parse_whatsapp_chat_fast: {fast_time:.2f}s ({args.lines / fast_time:,.0f} lines/s), "
+              f"{len(df_fast):,} messages, {df_fast['Timestamp'].isna().sum()} unparsed timestamps")
+
+        if args.reload:
+            prefix = os.path.join(tmp, 'synthetic_chat')
+            export_data(df_fast, prefix, xlsx=False, quiet=True, columnar=('parquet', 'feather'))
+            for extension in ('parquet', 'feather'):
+                reload_time, df_reloaded = time_parser(load_chat, f"{prefix}.{extension}")
+                print(f"load_chat (.{extension}):{' ' * (9 - len(extension))}{reload_time:.2f}s, "
+                      f"{len(df_reloaded):,} messages, identical: {df_reloaded.equals(df_fast)}")
+
+        if not args.skip_slow:
+            slow_time, df_slow = time_parser(parse_whatsapp_chat, path)
+            print(f"parse_whatsapp_chat:      {slow_time:.2f}s ({args.lines / slow_time:,.0f} lines/s), "
+                  f"{len(df_slow):,} messages")
+            print(f"\nSpeedup: {slow_time / fast_time:.1f}x, identical output: {df_fast.equals(df_slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,28 +8,179 @@ import re
 import pandas as pd
 from datetime import datetime
 import argparse
+import io
+import os
+import sqlite3
 import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 
+# Message headers of the known export formats, capturing date, time and author.
+# No part may cross a newline, so each one works both on single lines and on
+# whole blocks of text. Dates may be day- or month-first with 2- or 4-digit
+# years; times may have seconds and an AM/PM suffix.
+_DATE = r'(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})'
+_TIME = r'(\d{1,2}:\d{2}(?::\d{2})?(?:[^\S\n]*[AaPp]\.?[Mm]\.?)?)'
+CHAT_FORMATS = {
+    # iOS: [15/03/2024, 14:30:45] Author: message  /  [3/15/24, 2:30:45 PM] Author: message
+    'ios': r'\[' + _DATE + r',?[^\S\n]*' + _TIME + r'\][^\S\n]*([^:\n]+):',
+    # Android: 15/03/2024 14:30 - Author: message  /  3/15/24, 2:30 PM - Author: message
+    'android': _DATE + r',?[^\S\n]*' + _TIME + r'[^\S\n]*-[^\S\n]*([^:\n]+):',
+}
+DEFAULT_FORMAT = 'ios'
+DETECT_LINES = 500  # lines sampled from the start of the file to pick the format
+BLOCK_SIZE = 8 * 1024 * 1024  # characters read per block by the fast parser
+CHUNK_SIZE = 100_000  # messages per DataFrame chunk in streaming mode
+COLUMNS = ['Date', 'Time', 'Author', 'Message']
+DATE_FORMAT = '%d/%m/%Y'
+TIME_FORMAT = '%H:%M:%S'
+COLUMNAR_FORMATS = ('parquet', 'feather')
+INDEX_DB_DEFAULT = 'whatsapp_index.sqlite3'
 
-def parse_whatsapp_chat(file_path):
+
+def build_chat_format(name, date_format=DATE_FORMAT, time_format=TIME_FORMAT):
+    """
+    Compile the patterns of a format from CHAT_FORMATS.
+
+    Args:
+        name: Key in CHAT_FORMATS
+        date_format: strptime format of the Date column
+        time_format: strptime format of the Time column
+
+    Returns:
+        dict: name, line (pattern for parse_whatsapp_chat), header (pattern for the
+            block parser, starting with the newline before the header, a literal
+            prefix the regex engine can search for quickly), date_format, time_format
+    """
+    pattern = CHAT_FORMATS[name]
+    return {
+        'name': name,
+        'line': re.compile('^' + pattern + r'[^\S\n]*(.*)$'),
+        'header': re.compile('\n' + pattern + r'[^\S\n]*'),
+        'date_format': date_format,
+        'time_format': time_format,
+    }
+
+
+def detect_chat_format(lines):
+    """
+    Pick the export format matching most of the given lines and work out its date and time formats.
+
+    Day-first or month-first order is decided by any day above 12 in the
+    sample; when the sample can't tell, 12-hour chats are taken as month-first
+    (US) and the rest as day-first.
+
+    Args:
+        lines: Sample of lines from the start of the chat
+
+    Returns:
+        dict: Chat format as returned by build_chat_format (the iOS format with
+            DATE_FORMAT/TIME_FORMAT if no line matches any format)
+    """
+    best, best_matches = None, []
+    for name in CHAT_FORMATS:
+        line_pattern = build_chat_format(name)['line']
+        matches = [m for m in map(line_pattern.match, lines) if m]
+        if len(matches) > len(best_matches):
+            best, best_matches = name, matches
+    if best is None:
+        return build_chat_format(DEFAULT_FORMAT)
+
+    dates = [re.split(r'[./-]', m.group(1)) for m in best_matches]
+    times = [m.group(2) for m in best_matches]
+    twelve_hour = any(re.search(r'[AaPp]', time) for time in times)
+    if any(int(day) > 12 for day, _, _ in dates):
+        day_first = True
+    elif any(int(month) > 12 for _, month, _ in dates):
+        day_first = False
+    else:
+        day_first = not twelve_hour
+    separator = re.search(r'[./-]', best_matches[0].group(1)).group()
+    year = '%y' if len(dates[0][2]) == 2 else '%Y'
+    date_format = separator.join(['%d', '%m', year] if day_first else ['%m', '%d', year])
+    time_format = ('%I' if twelve_hour else '%H') + ':%M'
+    if times[0].count(':') == 2:
+        time_format += ':%S'
+    if twelve_hour:
+        time_format += ' %p'
+    return build_chat_format(best, date_format, time_format)
+
+
+def _sample_lines(file):
+    """Read the first DETECT_LINES lines of an open chat file and rewind it."""
+    sample = [line.rstrip('\n') for _, line in zip(range(DETECT_LINES), file)]
+    file.seek(0)
+    return sample
+
+
+def _detect_file_format(file):
+    """Detect the format of an open chat file from its first DETECT_LINES lines and rewind it."""
+    return detect_chat_format(_sample_lines(file))
+
+
+def _looks_like_chat(file):
+    """Tell whether any of the first DETECT_LINES lines of an open file is a message header of a known format."""
+    sample = _sample_lines(file)
+    return any(
+        build_chat_format(name)['line'].match(line) for name in CHAT_FORMATS for line in sample
+    )
+
+
+def add_typed_columns(df, date_format=DATE_FORMAT, time_format=TIME_FORMAT):
+    """
+    Add a datetime64 Timestamp column (from Date and Time) and store Author as a categorical.
+
+    Date and Time are kept as text, and CSV/Excel exports (main and per
+    author) gain a Timestamp column after them; time filters and reloads
+    from Parquet/Feather use Timestamp instead of re-parsing strings. A chat has few distinct dates and times, so only
+    those are parsed and then mapped back to the rows, which is several
+    times faster than parsing a full timestamp string per message.
+
+    Args:
+        df: DataFrame with columns Date, Time, Author, Message
+        date_format: strptime format of the Date column
+        time_format: strptime format of the Time column
+
+    Returns:
+        pandas.DataFrame: The same DataFrame, modified in place
+    """
+    dates = pd.Categorical(df['Date'])
+    times = pd.Categorical(df['Time'])
+    time_values = times.categories
+    if '%p' in time_format:
+        # 12-hour clocks come as "2:30 PM", "2:30\u202fpm" or "2:30 p.m."
+        time_values = time_values.str.replace(r'\s+', ' ', regex=True).str.replace('.', '').str.upper()
+    days = pd.to_datetime(dates.categories, format=date_format, errors='coerce')
+    clock = pd.to_datetime(time_values, format=time_format, errors='coerce') - pd.Timestamp('1900-01-01')
+    df.insert(2, 'Timestamp', days.take(dates.codes) + clock.take(times.codes))
+    df['Author'] = df['Author'].astype('category')
+    return df
+
+
+def parse_whatsapp_chat(file_path, chat_format=None):
     """
     Parse WhatsApp chat backup file.
 
     Args:
         file_path: Path to the WhatsApp .txt backup file
+        chat_format: Format from build_chat_format/detect_chat_format
+            (default: detected from the first lines of the file)
 
     Returns:
-        pandas.DataFrame: DataFrame with columns Date, Time, Author, Message
+        pandas.DataFrame: DataFrame with columns Date, Time, Timestamp, Author, Message
     """
-    # Pattern to match WhatsApp message format: [DD/MM/YYYY, HH:MM:SS] Author: Message
-    message_pattern = re.compile(r'^\[(\d{2}/\d{2}/\d{4}),\s*(\d{2}:\d{2}:\d{2})\]\s*([^:]+):\s*(.*)$')
-
     messages = []
     current_message = None
 
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
+            if chat_format is None:
+                chat_format = _detect_file_format(file)
+            # Pattern to match the message header, e.g. [DD/MM/YYYY, HH:MM:SS] Author: Message
+            message_pattern = chat_format['line']
             for line in file:
                 line = line.rstrip('\n')
                 match = message_pattern.match(line)
@@ -45,17 +196,21 @@ def parse_whatsapp_chat(file_path):
                         'Date': date,
                         'Time': time,
                         'Author': author.strip(),
-                        'Message': content
+                        'Message': [content]
                     }
                 else:
-                    # Continuation of previous message (multi-line message)
+                    # Continuation of previous message (multi-line message); lines are
+                    # joined once at the end, so a huge message doesn't cost quadratic time
                     if current_message:
-                        current_message['Message'] += '\n' + line
+                        current_message['Message'].append(line)
 
             # Don't forget the last message
             if current_message:
                 messages.append(current_message)
 
+            for message in messages:
+                message['Message'] = '\n'.join(message['Message'])
+
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -65,29 +220,679 @@ def parse_whatsapp_chat(file_path):
 
     if not messages:
         print("Warning: No messages found in the file.")
-        return pd.DataFrame(columns=['Date', 'Time', 'Author', 'Message'])
+        return add_typed_columns(pd.DataFrame(columns=COLUMNS, dtype=str))
 
     df = pd.DataFrame(messages)
+    return add_typed_columns(df, chat_format['date_format'], chat_format['time_format'])
+
+
+def _split_messages(text, header):
+    """
+    Split chat text into column lists with a single regex pass.
+
+    text must start with a newline and end right before the newline of the
+    next message header (or at the end of the file). Anything before the
+    first header is dropped. Each message keeps its continuation lines, so
+    no per-line string concatenation is needed.
+
+    Args:
+        text: Chat text
+        header: Compiled header pattern of the chat format
+
+    Returns:
+        tuple: (dates, times, authors, messages) lists
+    """
+    parts = header.split(text)
+    # parts = [text before 1st header, date, time, author, message, date, time, author, message, ...]
+    authors = [author.strip() for author in parts[3::4]]
+    return parts[1::4], parts[2::4], authors, parts[4::4]
+
+
+def _last_header_start(text, header):
+    """Return the offset of the newline before the last message header in text, or None."""
+    end = len(text)
+    while end > 0:
+        line_start = text.rfind('\n', 0, end - 1)
+        if line_start < 0:
+            return None
+        if header.match(text, line_start):
+            return line_start
+        end = line_start + 1
+    return None
+
+
+def _iter_message_blocks(file, block_size=BLOCK_SIZE, chat_format=None):
+    """
+    Read an open chat file in large blocks and yield its messages block by block.
+
+    chat_format defaults to the one detected from the first lines of the file.
+
+    The last message of each block may continue in the next one, so the text
+    from its header onwards is carried over and parsed with the next block.
+
+    Yields:
+        tuple: (dates, times, authors, messages) lists for the messages completed so far
+    """
+    if chat_format is None:
+        chat_format = _detect_file_format(file)
+    header = chat_format['header']
+    carry = '\n'  # Lets a header on the very first line match like any other
+    while True:
+        block = file.read(block_size)
+        text = carry + block
+        if not block:
+            # End of file: whatever is left is complete, minus the final line break
+            if text.endswith('\n'):
+                text = text[:-1]
+            yield _split_messages(text, header)
+            return
+        start = _last_header_start(text, header)
+        if start is None:
+            # Still inside one long message (or lines before the first message)
+            carry = text
+            continue
+        if start > 0:
+            yield _split_messages(text[:start], header)
+        carry = text[start:]
+
+
+def parse_whatsapp_chat_fast(file_path, block_size=BLOCK_SIZE, chat_format=None):
+    """
+    Parse WhatsApp chat backup file in large blocks (fast path for big exports).
+
+    Gives the same result as parse_whatsapp_chat, but finds message boundaries
+    with one multiline regex per block and builds the DataFrame column by
+    column instead of line by line.
+
+    Args:
+        file_path: Path to the WhatsApp .txt backup file
+        block_size: Number of characters read at a time
+        chat_format: Format from build_chat_format/detect_chat_format
+            (default: detected from the first lines of the file)
+
+    Returns:
+        pandas.DataFrame: DataFrame with columns Date, Time, Timestamp, Author, Message
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            df = _read_chat_blocks(file, block_size, chat_format)
+
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        sys.exit(1)
+
+    if df.empty:
+        print("Warning: No messages found in the file.")
     return df
 
 
-def export_data(df, output_prefix):
+def _read_chat_blocks(file, block_size=BLOCK_SIZE, chat_format=None):
+    """Parse an open chat file with the block parser into a DataFrame (empty if there are no messages)."""
+    if chat_format is None:
+        chat_format = _detect_file_format(file)
+    columns = {'Date': [], 'Time': [], 'Author': [], 'Message': []}
+    for dates, times, authors, messages in _iter_message_blocks(file, block_size, chat_format):
+        columns['Date'].extend(dates)
+        columns['Time'].extend(times)
+        columns['Author'].extend(authors)
+        columns['Message'].extend(messages)
+
+    if not columns['Date']:
+        return add_typed_columns(pd.DataFrame(columns=COLUMNS, dtype=str))
+    return add_typed_columns(pd.DataFrame(columns), chat_format['date_format'], chat_format['time_format'])
+
+
+def iter_whatsapp_messages(file_path, block_size=BLOCK_SIZE, chat_format=None):
+    """
+    Iterate over the messages of a WhatsApp chat backup file without loading it all.
+
+    Args:
+        file_path: Path to the WhatsApp .txt backup file
+        block_size: Number of characters read at a time
+        chat_format: Format from build_chat_format/detect_chat_format
+            (default: detected from the first lines of the file)
+
+    Yields:
+        dict: One message with keys Date, Time, Author, Message
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for dates, times, authors, messages in _iter_message_blocks(file, block_size, chat_format):
+            for date, time, author, message in zip(dates, times, authors, messages):
+                yield {'Date': date, 'Time': time, 'Author': author, 'Message': message}
+
+
+def iter_whatsapp_chunks(file_path, chunksize=CHUNK_SIZE, block_size=BLOCK_SIZE, chat_format=None):
+    """
+    Parse a WhatsApp chat backup file into DataFrames of at most chunksize messages.
+
+    Only one block of text and one chunk are held in memory at a time, so
+    memory use stays the same whatever the size of the chat.
+
+    Args:
+        file_path: Path to the WhatsApp .txt backup file
+        chunksize: Maximum number of messages per DataFrame
+        block_size: Number of characters read at a time
+        chat_format: Format from build_chat_format/detect_chat_format
+            (default: detected from the first lines of the file)
+
+    Yields:
+        pandas.DataFrame: Chunk with columns Date, Time, Timestamp, Author, Message
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        yield from _iter_file_chunks(file, chunksize, block_size, chat_format)
+
+
+def _iter_file_chunks(file, chunksize=CHUNK_SIZE, block_size=BLOCK_SIZE, chat_format=None):
+    """Parse an open chat file into DataFrames of at most chunksize messages."""
+    if chat_format is None:
+        chat_format = _detect_file_format(file)
+    typed = (chat_format['date_format'], chat_format['time_format'])
+    columns = {column: [] for column in COLUMNS}
+    for block_columns in _iter_message_blocks(file, block_size, chat_format):
+        for column, values in zip(COLUMNS, block_columns):
+            columns[column].extend(values)
+        full = len(columns['Date']) // chunksize * chunksize
+        if full:
+            for start in range(0, full, chunksize):
+                yield add_typed_columns(pd.DataFrame(
+                    {column: values[start:start + chunksize] for column, values in columns.items()}
+                ), *typed)
+            columns = {column: values[full:] for column, values in columns.items()}
+    if columns['Date']:
+        yield add_typed_columns(pd.DataFrame(columns), *typed)
+
+
+@contextmanager
+def open_chat_source(path, member=None):
+    """
+    Open a chat for reading: a .txt file, or the member of a .zip export named by member.
+
+    Zip members are decoded as they are read, without extracting them to disk.
+    """
+    if member is None:
+        with open(path, 'r', encoding='utf-8') as file:
+            yield file
+    else:
+        with zipfile.ZipFile(path) as archive, archive.open(member) as raw:
+            yield io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def chat_source_name(path, member=None):
+    """Name of a chat in the Chat column: the file path, or zip path/member for zipped chats."""
+    return path if member is None else f"{path}/{member}"
+
+
+def find_chat_sources(paths):
     """
-    Export DataFrame to CSV and Excel formats.
+    Expand chat files, folders and .zip exports into the list of chats to parse.
+
+    Folders are searched recursively for .txt and .zip files. Inside a zip
+    ("export with media"), every .txt member is considered. Found .txt files and
+    members only count when their first lines have WhatsApp message headers,
+    so notes and documents shared in the chat are skipped. A .txt path given
+    explicitly is always parsed.
+
+    Args:
+        paths: .txt files, folders and .zip archives
+
+    Returns:
+        list: (path, member) tuples, member being None for plain .txt files
+    """
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, filenames in os.walk(path):
+                dirs.sort()
+                for filename in sorted(filenames):
+                    file_path = os.path.join(root, filename)
+                    if filename.lower().endswith('.zip'):
+                        sources.extend(_zip_chat_sources(file_path))
+                    elif filename.lower().endswith('.txt'):
+                        try:
+                            with open_chat_source(file_path) as file:
+                                if _looks_like_chat(file):
+                                    sources.append((file_path, None))
+                        except (OSError, UnicodeDecodeError) as e:
+                            print(f"Error reading {file_path}: {e}")
+        elif path.lower().endswith('.zip'):
+            sources.extend(_zip_chat_sources(path))
+        else:
+            sources.append((path, None))
+    return sources
+
+
+def _zip_chat_sources(zip_path):
+    """Return the (zip_path, member) sources of the chats inside a .zip export."""
+    sources = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [name for name in archive.namelist() if name.lower().endswith('.txt')]
+        for member in members:
+            with open_chat_source(zip_path, member) as file:
+                if _looks_like_chat(file):
+                    sources.append((zip_path, member))
+    except (OSError, UnicodeDecodeError, zipfile.BadZipFile) as e:
+        print(f"Error reading {zip_path}: {e}")
+    return sources
+
+
+def _parse_chat_source(source, block_size=BLOCK_SIZE):
+    """Parse one (path, member) source; returns (DataFrame, None) or (None, error message)."""
+    try:
+        with open_chat_source(*source) as file:
+            return _read_chat_blocks(file, block_size), None
+    except Exception as e:
+        return None, str(e)
+
+
+def parse_chat_sources(sources, jobs=1, block_size=BLOCK_SIZE):
+    """
+    Parse many chats into one DataFrame, in parallel across jobs processes when jobs > 1.
+
+    Each chat is parsed with the block parser in its own format. Chats that
+    can't be read are reported and left out.
+
+    Args:
+        sources: (path, member) tuples from find_chat_sources
+        jobs: Number of worker processes parsing chats
+        block_size: Number of characters read at a time
+
+    Returns:
+        pandas.DataFrame: DataFrame with columns Chat, Date, Time, Timestamp, Author, Message,
+            in the order of sources
+    """
+    if jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(_parse_chat_source, sources, [block_size] * len(sources))
+    else:
+        executor = None
+        results = (_parse_chat_source(source, block_size) for source in sources)
+
+    frames = []
+    for source, (df, error) in zip(sources, results):
+        name = chat_source_name(*source)
+        if error is not None:
+            print(f"Error reading {name}: {error}")
+            continue
+        print(f"  {name}: {len(df)} messages")
+        if not df.empty:
+            df.insert(0, 'Chat', name)
+            frames.append(df)
+
+    if executor is not None:
+        executor.shutdown()
+
+    if not frames:
+        df_all = add_typed_columns(pd.DataFrame(columns=COLUMNS, dtype=str))
+        df_all.insert(0, 'Chat', pd.Series(dtype=str))
+    else:
+        df_all = pd.concat(frames, ignore_index=True)
+    # Categories differ between chats, so concat falls back to plain strings
+    df_all['Chat'] = df_all['Chat'].astype('category')
+    df_all['Author'] = df_all['Author'].astype('category')
+    return df_all
+
+
+def iter_chat_source_chunks(sources, chunksize=CHUNK_SIZE, block_size=BLOCK_SIZE):
+    """
+    Stream many chats, one after the other, as DataFrames of at most chunksize messages.
+
+    Yields:
+        pandas.DataFrame: Chunk with columns Chat, Date, Time, Timestamp, Author, Message
+    """
+    for source in sources:
+        name = chat_source_name(*source)
+        try:
+            with open_chat_source(*source) as file:
+                for chunk in _iter_file_chunks(file, chunksize, block_size):
+                    chunk.insert(0, 'Chat', name)
+                    yield chunk
+        except (OSError, UnicodeDecodeError, zipfile.BadZipFile) as e:
+            print(f"Error reading {name}: {e}")
+
+
+def author_output_prefix(output_prefix, author):
+    """Build the output prefix for an author's files, sanitizing the name for the filesystem."""
+    safe_author = re.sub(r'[^\w\s-]', '_', author).strip()
+    return f"{output_prefix}_{safe_author}"
+
+
+def export_streaming(chunks, output_prefix):
+    """
+    Write chat chunks to CSV as they arrive: one file for the whole chat and one per author.
+
+    Excel output is skipped because it cannot be written incrementally.
+
+    Args:
+        chunks: Iterable of DataFrames, e.g. from iter_whatsapp_chunks
+        output_prefix: Prefix for output files (without extension)
+
+    Returns:
+        pandas.Series: Number of messages per author
+    """
+    csv_file = f"{output_prefix}.csv"
+    main_file = None
+    author_files = {}
+    counts = {}
+    try:
+        for chunk in chunks:
+            # Opened on the first chunk, so a chat that can't be read leaves no empty CSV behind
+            if main_file is None:
+                main_file = open(csv_file, 'w', encoding='utf-8', newline='')
+                chunk.to_csv(main_file, index=False)
+            else:
+                chunk.to_csv(main_file, index=False, header=False)
+            for author, df_author in chunk.groupby('Author', sort=False, observed=True):
+                if author not in author_files:
+                    author_csv = f"{author_output_prefix(output_prefix, author)}.csv"
+                    author_files[author] = open(author_csv, 'w', encoding='utf-8', newline='')
+                    df_author.to_csv(author_files[author], index=False)
+                else:
+                    df_author.to_csv(author_files[author], index=False, header=False)
+                counts[author] = counts.get(author, 0) + len(df_author)
+            print(f"  {sum(counts.values())} messages written...")
+        if main_file is None:
+            main_file = open(csv_file, 'w', encoding='utf-8', newline='')  # Chat without messages
+    finally:
+        if main_file is not None:
+            main_file.close()
+        for author_file in author_files.values():
+            author_file.close()
+
+    print(f"✓ Exported to CSV: {csv_file}")
+    for author in author_files:
+        print(f"✓ Exported to CSV: {author_output_prefix(output_prefix, author)}.csv")
+    return pd.Series(counts, dtype='int64').sort_values(ascending=False)
+
+
+def export_data(df, output_prefix, xlsx=True, excel_engine='openpyxl', quiet=False, columnar=()):
+    """
+    Export DataFrame to CSV and Excel formats, plus optional Parquet/Feather.
 
     Args:
         df: pandas DataFrame to export
         output_prefix: Prefix for output files (without extension)
+        xlsx: Also write the Excel file
+        excel_engine: pandas Excel writer engine ('openpyxl' or the faster 'xlsxwriter')
+        quiet: Don't print the exported files (used by worker processes)
+        columnar: Columnar formats to also write ('parquet', 'feather'); they keep
+            the Timestamp and categorical Author types, so reloading needs no parsing
+
+    Returns:
+        list: Progress messages for the files written
     """
+    written = []
+
     # Export to CSV
     csv_file = f"{output_prefix}.csv"
     df.to_csv(csv_file, index=False, encoding='utf-8')
-    print(f"✓ Exported to CSV: {csv_file}")
+    written.append(f"✓ Exported to CSV: {csv_file}")
 
     # Export to Excel
-    excel_file = f"{output_prefix}.xlsx"
-    df.to_excel(excel_file, index=False, engine='openpyxl')
-    print(f"✓ Exported to Excel: {excel_file}")
+    if xlsx:
+        excel_file = f"{output_prefix}.xlsx"
+        df.to_excel(excel_file, index=False, engine=excel_engine)
+        written.append(f"✓ Exported to Excel: {excel_file}")
+
+    # Export to columnar formats (need pyarrow)
+    if 'parquet' in columnar:
+        parquet_file = f"{output_prefix}.parquet"
+        df.to_parquet(parquet_file, index=False)
+        written.append(f"✓ Exported to Parquet: {parquet_file}")
+    if 'feather' in columnar:
+        feather_file = f"{output_prefix}.feather"
+        df.reset_index(drop=True).to_feather(feather_file)
+        written.append(f"✓ Exported to Feather: {feather_file}")
+
+    if not quiet:
+        print('\n'.join(written))
+    return written
+
+
+def load_chat(file_path):
+    """
+    Load a chat previously exported to Parquet or Feather.
+
+    Args:
+        file_path: Path to a .parquet or .feather file written by export_data
+
+    Returns:
+        pandas.DataFrame: DataFrame with columns Date, Time, Timestamp, Author, Message
+    """
+    if str(file_path).endswith('.feather'):
+        return pd.read_feather(file_path)
+    return pd.read_parquet(file_path)
+
+
+def export_partitioned(df_all, output_prefix, jobs=1, xlsx=True, excel_engine='openpyxl', columnar=()):
+    """
+    Export the whole chat and one file set per author.
+
+    Splits the messages by author in a single groupby pass, then writes all
+    the files, in parallel across jobs worker processes when jobs > 1.
+
+    Args:
+        df_all: DataFrame with every message
+        output_prefix: Prefix for output files (without extension)
+        jobs: Number of worker processes writing files
+        xlsx: Also write Excel files
+        excel_engine: pandas Excel writer engine
+        columnar: Columnar formats to also write ('parquet', 'feather')
+    """
+    exports = [(df_all, output_prefix)]
+    for author, df_author in df_all.groupby('Author', sort=False, observed=True):
+        print(f"Author: {author} ({len(df_author)} messages)")
+        exports.append((df_author, author_output_prefix(output_prefix, author)))
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(export_data, df, prefix, xlsx, excel_engine, True, columnar) for df, prefix in exports]
+            for future in as_completed(futures):
+                print('\n'.join(future.result()))  # Also re-raises any error from the workers
+    else:
+        for df, prefix in exports:
+            export_data(df, prefix, xlsx, excel_engine, columnar=columnar)
+
+
+def open_index(db_path):
+    """Open (creating if needed) the full-text index of chat messages."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS chats (
+            id INTEGER PRIMARY KEY, name TEXT UNIQUE, mtime REAL, size INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY, chat_id INTEGER, seq INTEGER,
+            date TEXT, time TEXT, timestamp TEXT, author TEXT, message TEXT
+        );
+        CREATE INDEX IF NOT EXISTS messages_chat_seq ON messages (chat_id, seq);
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            author, message, content = 'messages', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """)
+    return conn
+
+
+def _remove_chat(conn, chat_id):
+    # messages_fts only stores the index, so the old text is needed to delete its entries
+    conn.execute("""
+        INSERT INTO messages_fts (messages_fts, rowid, author, message)
+        SELECT 'delete', id, author, message FROM messages WHERE chat_id = ?
+    """, (chat_id,))
+    conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+    conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+
+def _is_under(name, path):
+    """Tell whether the chat called name comes from path (the file itself, a folder or a zip)."""
+    return name == path or name.startswith(path.rstrip('/' + os.sep) + os.sep) or name.startswith(path + '/')
+
+
+def build_index(paths, db_path=INDEX_DB_DEFAULT, jobs=1):
+    """
+    Index the messages of every chat found in paths (files, folders, .zip exports).
+
+    Only chats whose file is new or changed (mtime/size) since the last run are
+    parsed again; chats that disappeared from the given folders/zips are dropped.
+
+    Args:
+        paths: Chat .txt files, folders and .zip archives
+        db_path: SQLite index file
+        jobs: Number of worker processes parsing chats
+
+    Returns:
+        tuple: (chats indexed, chats unchanged, chats removed)
+    """
+    paths = [os.path.abspath(path) for path in paths]
+    conn = open_index(db_path)
+    indexed = {name: (chat_id, mtime, size) for chat_id, name, mtime, size
+               in conn.execute("SELECT id, name, mtime, size FROM chats")}
+
+    current = {}
+    for source in find_chat_sources(paths):
+        try:
+            stat = os.stat(source[0])
+        except OSError as e:
+            # Not in current, so a chat indexed under this path is dropped below
+            print(f"Error reading {chat_source_name(*source)}: {e.strerror}")
+            continue
+        current[chat_source_name(*source)] = (source, stat.st_mtime, stat.st_size)
+
+    to_index = [name for name, (_, mtime, size) in current.items()
+                if name not in indexed or indexed[name][1:] != (mtime, size)]
+    removed = [name for name in indexed
+               if name not in current and any(_is_under(name, path) for path in paths)]
+
+    with conn:
+        for name in removed:
+            _remove_chat(conn, indexed[name][0])
+
+    sources = [current[name][0] for name in to_index]
+    if jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(_parse_chat_source, sources)
+    else:
+        executor = None
+        results = map(_parse_chat_source, sources)
+
+    indexed_count = 0
+    for count, (name, (df, error)) in enumerate(zip(to_index, results), start=1):
+        if error is not None:
+            print(f"Error reading {name}: {error}")
+            continue  # Retried on the next run
+        timestamps = df['Timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+        timestamps = timestamps.where(df['Timestamp'].notna(), None)
+        with conn:
+            if name in indexed:
+                _remove_chat(conn, indexed[name][0])
+            _, mtime, size = current[name]
+            chat_id = conn.execute("INSERT INTO chats (name, mtime, size) VALUES (?, ?, ?)",
+                                   (name, mtime, size)).lastrowid
+            conn.executemany(
+                "INSERT INTO messages (chat_id, seq, date, time, timestamp, author, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip([chat_id] * len(df), range(len(df)), df['Date'], df['Time'], timestamps,
+                    df['Author'].astype(str), df['Message'])
+            )
+            conn.execute("""
+                INSERT INTO messages_fts (rowid, author, message)
+                SELECT id, author, message FROM messages WHERE chat_id = ?
+            """, (chat_id,))
+        indexed_count += 1
+        print(f"[{count}/{len(to_index)}] Indexed {name} ({len(df)} messages)")
+
+    if executor is not None:
+        executor.shutdown()
+    conn.close()
+    return indexed_count, len(current) - len(to_index), len(removed)
+
+
+def search_index(query, db_path=INDEX_DB_DEFAULT, limit=20, context=2):
+    """
+    Run an FTS5 query (words, "exact phrases", AND/OR/NOT, author:name) against the index.
+
+    Matching ignores case and accents ("audiencia" finds "Audiência").
+
+    Args:
+        query: SQLite FTS5 query
+        db_path: SQLite index file
+        limit: Maximum number of matching messages
+        context: Messages of the same chat to return before and after each match
+
+    Returns:
+        list: (chat name, messages) per match, best matches first; messages are
+            (seq, date, time, author, message, is_match) tuples in chat order,
+            with the matched terms of the hit in [brackets]
+    """
+    conn = open_index(db_path)
+    hits = conn.execute("""
+        SELECT messages.chat_id, messages.seq, chats.name, highlight(messages_fts, 1, '[', ']')
+        FROM messages_fts
+        JOIN messages ON messages.id = messages_fts.rowid
+        JOIN chats ON chats.id = messages.chat_id
+        WHERE messages_fts MATCH ?
+        ORDER BY messages_fts.rank
+        LIMIT ?
+    """, (query, limit)).fetchall()
+
+    results = []
+    for chat_id, seq, name, highlighted in hits:
+        rows = conn.execute("""
+            SELECT seq, date, time, author, message FROM messages
+            WHERE chat_id = ? AND seq BETWEEN ? AND ?
+            ORDER BY seq
+        """, (chat_id, seq - context, seq + context)).fetchall()
+        results.append((name, [
+            (row_seq, date, time_, author, highlighted if row_seq == seq else message, row_seq == seq)
+            for row_seq, date, time_, author, message in rows
+        ]))
+    conn.close()
+    return results
+
+
+def index_main(argv):
+    """Handle the index and search subcommands."""
+    parser = argparse.ArgumentParser(
+        prog='whatsapp_parser.py',
+        description='Build or search a full-text index of WhatsApp messages'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    index_parser = subparsers.add_parser('index', help='Create or incrementally update the index')
+    index_parser.add_argument('input_file', nargs='+', help='Chat .txt files, folders or .zip exports')
+    index_parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes parsing chats')
+    index_parser.add_argument('--db', default=INDEX_DB_DEFAULT, help=f'Index file (default: {INDEX_DB_DEFAULT})')
+    search_parser = subparsers.add_parser('search', help='Search the index')
+    search_parser.add_argument('query', help='Words or "quoted phrases" (SQLite FTS5 syntax), accents and case ignored')
+    search_parser.add_argument('-n', '--limit', type=int, default=20, help='Maximum number of matches (default: 20)')
+    search_parser.add_argument('-C', '--context', type=int, default=2,
+                               help='Messages shown before and after each match (default: 2)')
+    search_parser.add_argument('--db', default=INDEX_DB_DEFAULT, help=f'Index file (default: {INDEX_DB_DEFAULT})')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'index':
+        indexed, unchanged, removed = build_index(args.input_file, args.db, args.jobs)
+        print(f"\n{indexed} chats indexed, {unchanged} unchanged, {removed} removed "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        if not os.path.exists(args.db):
+            print(f"Error: Index '{args.db}' not found, build it with: whatsapp_parser.py index <chats>")
+            sys.exit(1)
+        try:
+            results = search_index(args.query, args.db, args.limit, args.context)
+        except sqlite3.OperationalError as e:
+            print(f"Invalid query: {e}")
+            sys.exit(1)
+        for name, messages in results:
+            print(f"== {name} ==")
+            for _, date, time_, author, message, is_match in messages:
+                print(f"{'>' if is_match else ' '} [{date}, {time_}] {author}: {message}")
+            print()
+        print(f"{len(results)} results in {(time.perf_counter() - start) * 1000:.0f} ms")
 
 
 def main():
@@ -96,27 +901,111 @@ def main():
     )
     parser.add_argument(
         'input_file',
-        help='Path to WhatsApp chat backup .txt file'
+        nargs='+',
+        help='Path to WhatsApp chat backup .txt file; several files, folders or .zip exports '
+             'are parsed into one dataset with a Chat column'
     )
     parser.add_argument(
         '-o', '--output',
         default=None,
         help='Output file prefix (default: same directory and name as input file)'
     )
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Use the block-based parser (much faster on very large exports)'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='Parse chats and write the main and per-author files in parallel with this many processes '
+             '(uses a single groupby pass over the messages)'
+    )
+    parser.add_argument(
+        '--no-xlsx',
+        action='store_true',
+        help='Only write CSV files (Excel writing is by far the slowest step)'
+    )
+    parser.add_argument(
+        '--excel-engine',
+        choices=['openpyxl', 'xlsxwriter'],
+        default='openpyxl',
+        help='Excel writer engine; xlsxwriter is faster but must be installed separately (default: openpyxl)'
+    )
+    parser.add_argument(
+        '--columnar',
+        choices=COLUMNAR_FORMATS,
+        action='append',
+        default=[],
+        help='Also export to Parquet or Feather (repeatable); these keep typed columns and reload in '
+             'a fraction of the time of re-parsing the chat (needs pyarrow)'
+    )
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=None,
+        help='Stream the chat in chunks of this many messages and write CSV incrementally '
+             '(constant memory, no Excel output)'
+    )
 
     args = parser.parse_args()
 
-    # If no output specified, use input file's directory and stem
+    if args.excel_engine == 'xlsxwriter' and not args.no_xlsx:
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            print("Error: --excel-engine xlsxwriter needs the xlsxwriter package (pip install xlsxwriter).")
+            sys.exit(1)
+
+    # Several inputs, a folder or a zip export: parse every chat found into one dataset
+    input_file = args.input_file[0]
+    batch = len(args.input_file) > 1 or os.path.isdir(input_file) or input_file.lower().endswith('.zip')
+
+    # If no output specified, use (first) input file's directory and stem
     if args.output is None:
-        input_path = Path(args.input_file)
+        input_path = Path(input_file)
         output_prefix = str(input_path.parent / input_path.stem)
     else:
         output_prefix = args.output
 
-    print(f"Parsing WhatsApp chat file: {args.input_file}")
+    if batch:
+        sources = find_chat_sources(args.input_file)
+        print(f"Found {len(sources)} chats in {', '.join(args.input_file)}")
+    else:
+        print(f"Parsing WhatsApp chat file: {input_file}")
 
-    # Parse the chat file
-    df_all = parse_whatsapp_chat(args.input_file)
+    if args.chunksize:
+        print(f"\nStreaming in chunks of {args.chunksize} messages (CSV only)...")
+        if batch:
+            chunks = iter_chat_source_chunks(sources, args.chunksize)
+        else:
+            chunks = iter_whatsapp_chunks(input_file, args.chunksize)
+        try:
+            counts = export_streaming(chunks, output_prefix)
+        except FileNotFoundError:
+            print(f"Error: File '{input_file}' not found.")
+            sys.exit(1)
+        if counts.empty:
+            print("No data to export.")
+            sys.exit(1)
+
+        print("\n✓ All exports completed successfully!")
+        print("\n" + "="*50)
+        print("SUMMARY")
+        print("="*50)
+        print(f"Total messages: {counts.sum()}")
+        print("\nMessages per author:")
+        print(counts.to_string())
+        return
+
+    # Parse the chat file(s)
+    if batch:
+        df_all = parse_chat_sources(sources, jobs=args.jobs)
+    elif args.fast:
+        df_all = parse_whatsapp_chat_fast(input_file)
+    else:
+        df_all = parse_whatsapp_chat(input_file)
 
     if df_all.empty:
         print("No data to export.")
@@ -128,20 +1017,10 @@ def main():
     authors = df_all['Author'].unique()
     print(f"Authors found: {', '.join(authors)}")
 
-    # Export main DataFrame
-    print("\nExporting main chat data...")
-    export_data(df_all, output_prefix)
-
-    # Export separate DataFrames for each author
-    if len(authors) > 0:
-        print("\nExporting individual author data...")
-        for author in authors:
-            df_author = df_all[df_all['Author'] == author].copy()
-            # Sanitize author name for filename
-            safe_author = re.sub(r'[^\w\s-]', '_', author).strip()
-            author_output_prefix = f"{output_prefix}_{safe_author}"
-            print(f"\nAuthor: {author} ({len(df_author)} messages)")
-            export_data(df_author, author_output_prefix)
+    # Export main DataFrame and one DataFrame per author
+    print("\nExporting main and per-author chat data...")
+    export_partitioned(df_all, output_prefix, jobs=args.jobs,
+                       xlsx=not args.no_xlsx, excel_engine=args.excel_engine, columnar=args.columnar)
 
     print("\n✓ All exports completed successfully!")
 
@@ -150,9 +1029,15 @@ def main():
     print("SUMMARY")
     print("="*50)
     print(f"Total messages: {len(df_all)}")
+    if batch:
+        print("\nMessages per chat:")
+        print(df_all['Chat'].value_counts().to_string())
     print("\nMessages per author:")
     print(df_all['Author'].value_counts().to_string())
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ('index', 'search'):
+        index_main(sys.argv[1:])
+        sys.exit(0)
     main()
@@ -0,0 +1,37 @@
+#Benchmark pdf_to_df.py's extraction backends on a folder of PDFs
+#Usage: python bench_pdf_to_df.py <folder> [--backends tika pypdf2 pdfplumber] [--workers N]
+
+import argparse
+import glob
+import os
+import time
+from pdf_to_df import BACKENDS, pdf_to_list
+
+
+def bench(folder, backend, workers):
+    """Time one full extraction of folder; returns (seconds, files, characters)."""
+    start = time.perf_counter()
+    metadata_list, text_list = pdf_to_list(folder, backend=backend, workers=workers)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(metadata_list), sum(len(text or '') for text in text_list)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Compare pdf_to_df extraction backends')
+    arg_parser.add_argument('folder', help='Folder with the PDF files to extract')
+    arg_parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    arg_parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    args = arg_parser.parse_args()
+
+    num_files = len(glob.glob(os.path.join(glob.escape(args.folder), '*.pdf')))
+    print(f"{num_files} PDFs in {args.folder}, {args.workers} workers for in-process backends\n")
+    print(f"{'backend':<12}{'seconds':>10}{'files/s':>10}{'chars':>12}")
+    for backend in args.backends:
+        try:
+            # tika's first call also starts the JVM server, so its time includes startup
+            elapsed, files, chars = bench(args.folder, backend, args.workers)
+        except Exception as e:
+            print(f"{backend:<12}  failed: {e}")
+            continue
+        rate = files / elapsed if elapsed > 0 else 0.0
+        print(f"{backend:<12}{elapsed:>10.2f}{rate:>10.1f}{chars:>12}")
@@ -0,0 +1,108 @@
+#Benchmark update_index_tjrj_3.py's column mapping and row updates on a large synthetic workbook
+#Usage: python bench_update_index_tjrj.py [--rows 50000] [--cols 100] [--full]
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from openpyxl import Workbook, load_workbook
+from update_index_tjrj_3 import header_index, table_columns, update_excel_with_openpyxl, update_table
+
+TABLE_WIDTH = 10  # every table is Data, Taxa and 8 other columns
+
+
+def write_workbook(path, rows, cols):
+    """Write a rows x cols sheet with a Data/Taxa pair every TABLE_WIDTH columns; a tenth of the dates are dd/mm/yyyy strings."""
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet('Debito')
+    header = []
+    for col_idx in range(cols):
+        position = col_idx % TABLE_WIDTH
+        header.append('Data' if position == 0 else 'Taxa' if position == 1 else f'Coluna {col_idx + 1}')
+    sheet.append(header)
+    for row_idx in range(rows):
+        date_value = datetime(1995 + row_idx % 30, row_idx % 12 + 1, 1)
+        if row_idx % 10 == 0:
+            date_value = date_value.strftime('%d/%m/%Y')
+        sheet.append([date_value if col_idx % TABLE_WIDTH == 0 else None if col_idx % TABLE_WIDTH == 1 else row_idx
+                      for col_idx in range(cols)])
+    wb.save(path)
+
+
+def legacy_columns(sheet, date_column, rate_column):
+    """Previous lookup: a full scan of row 1 (and of sheet.max_column) for every date column found."""
+    def find_column_indices(column_name):
+        return [col_idx for col_idx in range(1, sheet.max_column + 1)
+                if sheet.cell(row=1, column=col_idx).value == column_name]
+    columns = []
+    for date_col_idx in find_column_indices(date_column):
+        rate_col_indices = find_column_indices(rate_column)
+        columns.append((date_col_idx, min(rate_col_indices, key=lambda x: abs(x - date_col_idx))))
+    return columns
+
+
+def legacy_update(sheet, date_col_idx, rate_col_idx, correction_factors):
+    """Previous row loop: sheet.max_row per table and strptime on every string date."""
+    updated_count = not_found_count = 0
+    for row_idx in range(2, sheet.max_row + 1):
+        date_value = sheet.cell(row=row_idx, column=date_col_idx).value
+        if not date_value:
+            continue
+        if isinstance(date_value, str):
+            try:
+                date_value = datetime.strptime(date_value, '%d/%m/%Y')
+            except ValueError:
+                continue
+        key = (date_value.month, date_value.year)
+        if key in correction_factors:
+            sheet.cell(row=row_idx, column=rate_col_idx, value=correction_factors[key])
+            updated_count += 1
+        else:
+            not_found_count += 1
+    return updated_count, not_found_count
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Time update_index_tjrj_3 column mapping and row updates')
+    arg_parser.add_argument('--rows', type=int, default=50_000, help='Data rows (default: 50000)')
+    arg_parser.add_argument('--cols', type=int, default=100, help='Columns (default: 100)')
+    arg_parser.add_argument('--full', action='store_true',
+                            help='Also time a full update_excel_with_openpyxl run (load, update and save)')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'debito.xlsx')
+        elapsed, _ = timed(write_workbook, path, args.rows, args.cols)
+        print(f"Synthetic workbook: {args.rows} rows x {args.cols} columns, "
+              f"{os.path.getsize(path) / (1024 * 1024):.1f} MB ({elapsed:.1f}s to write)")
+        elapsed, wb = timed(load_workbook, path)
+        sheet = wb['Debito']
+        print(f"load_workbook: {elapsed:.1f}s\n")
+
+        legacy_time, legacy = timed(legacy_columns, sheet, 'Data', 'Taxa')
+        index_time, columns = timed(lambda: table_columns(header_index(sheet), 'Data', 'Taxa'))
+        print(f"{'step':<28}{'before':>10}{'after':>10}{'speedup':>10}")
+        print(f"{'column mapping':<28}{legacy_time:>10.3f}{index_time:>10.4f}{legacy_time / index_time:>9.0f}x"
+              f"  ({len(columns)} tables, same mapping: {legacy == columns})")
+
+        factors = {(month, year): 1 + (year - 1995) / 100 + month / 1000
+                   for year in range(1995, 2025) for month in range(1, 13)}
+        legacy_time, legacy = timed(lambda: [legacy_update(sheet, date_col_idx, rate_col_idx, factors)
+                                             for date_col_idx, rate_col_idx in legacy_columns(sheet, 'Data', 'Taxa')])
+        update_time, counts = timed(lambda: [update_table(sheet, date_col_idx, rate_col_idx, factors, sheet.max_row, {})
+                                             for date_col_idx, rate_col_idx in table_columns(header_index(sheet), 'Data', 'Taxa')])
+        print(f"{'mapping + row updates':<28}{legacy_time:>10.3f}{update_time:>10.3f}{legacy_time / update_time:>9.1f}x"
+              f"  ({sum(updated for updated, _ in counts)} rows updated, same counts: {legacy == counts})")
+        del wb, sheet
+
+        if args.full:
+            elapsed, _ = timed(update_excel_with_openpyxl, path, factors, os.path.join(tmp, 'out.xlsx'),
+                               [('Debito', 'Data', 'Taxa')])
+            print(f"\nupdate_excel_with_openpyxl (load, update, save): {elapsed:.1f}s")
@@ -0,0 +1,15 @@
+#Cache location and file hashing shared by pdf_ocr_search.py and update_index_tjrj_3.py
+import hashlib
+import os
+
+# Both scripts keep their caches here, keyed by the hash of the source PDF
+CACHE_DIR_DEFAULT = os.path.join(os.path.expanduser('~'), '.cache', 'automateoffice')
+
+
+def hash_file(path):
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
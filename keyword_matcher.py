@@ -0,0 +1,90 @@
+#Multi-keyword matcher shared by pdf_keyword_search.py and pdf_ocr_search.py
+import re
+import unicodedata
+from collections import deque
+
+# A word broken across lines by a hyphen ("prescri-\nção"), as OCR and PDF text layers produce
+HYPHENATED_BREAK = re.compile(r'(\w)-[ \t]*\r?\n[ \t]*(\w)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Fold text for accent- and case-insensitive matching of Portuguese legal text.
+
+    Joins words hyphenated across line breaks, strips accents (NFKD + drop
+    combining marks), casefolds and collapses whitespace, so "PRESCRIÇÃO",
+    "prescrição" and "prescri-\ncao" all become "prescricao".
+    """
+    text = HYPHENATED_BREAK.sub(r'\1\2', text)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return WHITESPACE.sub(' ', text.casefold())
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword in a single scan of the text.
+
+    Build it once per run and reuse it for every page or paragraph: the cost of
+    a scan depends on the length of the text, not on the number of keywords,
+    and overlapping keywords (e.g. "João" and "João Silva") are all reported.
+    """
+
+    def __init__(self, keywords, case_sensitive=False, normalize=False):
+        self.case_sensitive = case_sensitive
+        self.normalize = normalize  # fold accents/case/whitespace with normalize_text (overrides case_sensitive)
+        self.keywords = list(dict.fromkeys(keywords))  # drop duplicates, keep order
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for index, keyword in enumerate(self.keywords):
+            node = 0
+            for char in self._prepare(keyword):
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = child
+                node = child
+            if node:
+                self._out[node].append(index)
+
+        # Breadth-first pass to set failure links; each node also inherits the
+        # outputs of its failure node so suffix matches are not missed
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _prepare(self, text):
+        if self.normalize:
+            return normalize_text(text)
+        return text if self.case_sensitive else text.lower()
+
+    def iter_matches(self, text):
+        """Yield (end_position, keyword) for every occurrence of every keyword in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for position, char in enumerate(self._prepare(text)):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                yield position + 1, self.keywords[index]
+
+    def find_terms(self, text):
+        """Return the keywords found in text, in the order they were given."""
+        found = set()
+        for _, keyword in self.iter_matches(text):
+            found.add(keyword)
+            if len(found) == len(self.keywords):
+                break  # Every keyword seen, no need to scan the rest
+        return [keyword for keyword in self.keywords if keyword in found]
@@ -1,43 +1,292 @@
 #Script to find pdf files with keywords in them
+import argparse
 import os
+import sqlite3
 import sys
+import time
 import PyPDF2
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from keyword_matcher import KeywordMatcher
 
-def find_keyword_in_pdfs(folder_path, keyword):
-    matching_files = []
+INDEX_DB_DEFAULT = "pdf_index.sqlite3"
+
+def list_pdfs(folder_path, recursive=False):
+    """Return the paths of the PDFs in folder_path, relative to it."""
+    if not recursive:
+        return [filename for filename in os.listdir(folder_path) if filename.endswith('.pdf')]
+    pdfs = []
+    for root, _, filenames in os.walk(folder_path):
+        for filename in filenames:
+            if filename.endswith('.pdf'):
+                pdfs.append(os.path.relpath(os.path.join(root, filename), folder_path))
+    return sorted(pdfs)
+
+def scan_pdf(file_path, matcher):
+    """Return (keywords found, pages read) for a single PDF."""
+    found = set()
+    pages_read = 0
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        num_pages = len(pdf_reader.pages)
+
+        for page_num in range(num_pages):
+            page = pdf_reader.pages[page_num]
+            text = page.extract_text()
+            pages_read += 1
+            found.update(matcher.find_terms(text))
+            if len(found) == len(matcher.keywords):
+                break  # Stop searching this file as soon as every keyword is found
+    return [keyword for keyword in matcher.keywords if keyword in found], pages_read
+
+# Matcher built once per worker process by _init_worker instead of being pickled with every task
+_worker_matcher = None
+
+def _init_worker(keywords, case_sensitive, normalize):
+    global _worker_matcher
+    _worker_matcher = KeywordMatcher(keywords, case_sensitive=case_sensitive, normalize=normalize)
+
+def _scan_pdf_in_worker(folder_path, filename):
+    try:
+        terms, pages_read = scan_pdf(os.path.join(folder_path, filename), _worker_matcher)
+        return filename, terms, pages_read, None
+    except Exception as e:
+        return filename, [], 0, str(e)
 
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.pdf'):
+def iter_keyword_matches(folder_path, keywords, case_sensitive=True, workers=1, recursive=False, normalize=False):
+    """Yield (filename, keywords found, pages read) for every PDF as soon as it is scanned.
+
+    With workers > 1 files are scanned by a process pool and come back in
+    completion order rather than directory order. With normalize=True each
+    page is folded once (accents, case, hyphenation, whitespace) so a single
+    pass matches every spelling variant of the keywords.
+    """
+    filenames = list_pdfs(folder_path, recursive)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(keywords, case_sensitive, normalize)) as executor:
+            futures = [executor.submit(_scan_pdf_in_worker, folder_path, filename) for filename in filenames]
+            for future in as_completed(futures):
+                filename, terms, pages_read, error = future.result()
+                if error is not None:
+                    print(f"Error reading {filename}: {error}")
+                yield filename, terms, pages_read
+    else:
+        matcher = KeywordMatcher(keywords, case_sensitive=case_sensitive, normalize=normalize)
+        for filename in filenames:
             try:
-                file_path = os.path.join(folder_path, filename)
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    num_pages = len(pdf_reader.pages)
-
-                    for page_num in range(num_pages):
-                        page = pdf_reader.pages[page_num]
-                        text = page.extract_text()
-                        if keyword in text:
-                            matching_files.append(filename)
-                            break  # Stop searching this file as soon as the keyword is found
+                terms, pages_read = scan_pdf(os.path.join(folder_path, filename), matcher)
             except Exception as e:
                 print(f"Error reading {filename}: {e}")
+                terms, pages_read = [], 0
+            yield filename, terms, pages_read
 
+def find_keywords_in_pdfs(folder_path, keywords, case_sensitive=True, workers=1, recursive=False, normalize=False):
+    """Scan every PDF once for all keywords.
+
+    Returns a dict mapping each matching filename to the keywords found in it.
+    """
+    matching_files = {}
+    for filename, terms, _ in iter_keyword_matches(folder_path, keywords, case_sensitive, workers, recursive, normalize):
+        if terms:
+            matching_files[filename] = terms
     return matching_files
 
+def find_keyword_in_pdfs(folder_path, keyword):
+    return list(find_keywords_in_pdfs(folder_path, [keyword]))
+
+def extract_pages(file_path):
+    """Return the text of every page of a PDF, or None if it can't be read."""
+    try:
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            return [page.extract_text() or "" for page in pdf_reader.pages]
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return None
+
+def open_index(db_path):
+    """Open (creating if needed) the page-level full-text index."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY, file_id INTEGER, page INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS pages_file_id ON pages (file_id);
+        CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+            text, tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """)
+    return conn
+
+def _remove_file(conn, file_id):
+    conn.execute("DELETE FROM pages_fts WHERE rowid IN (SELECT id FROM pages WHERE file_id = ?)", (file_id,))
+    conn.execute("DELETE FROM pages WHERE file_id = ?", (file_id,))
+    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+def build_index(folder_path, db_path=INDEX_DB_DEFAULT, recursive=False, workers=1):
+    """Index the page text of every PDF in folder_path.
+
+    Only files that are new or whose mtime/size changed since the last run
+    are re-read; files that disappeared from the folder are dropped.
+    Returns (files indexed, files unchanged, files removed).
+    """
+    conn = open_index(db_path)
+    folder = os.path.abspath(folder_path)
+    indexed = {path: (file_id, mtime, size) for file_id, path, mtime, size
+               in conn.execute("SELECT id, path, mtime, size FROM files")}
+
+    current = {}
+    for filename in list_pdfs(folder, recursive):
+        path = os.path.join(folder, filename)
+        stat = os.stat(path)
+        current[path] = (stat.st_mtime, stat.st_size)
+
+    to_index = [path for path, stamp in current.items()
+                if path not in indexed or indexed[path][1:] != stamp]
+    removed = [path for path in indexed
+               if path.startswith(folder + os.sep) and path not in current]
+
+    with conn:
+        for path in removed:
+            _remove_file(conn, indexed[path][0])
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(extract_pages, to_index, chunksize=8)
+    else:
+        executor = None
+        results = map(extract_pages, to_index)
+
+    indexed_count = 0
+    for count, (path, page_texts) in enumerate(zip(to_index, results), start=1):
+        if page_texts is None:
+            continue  # Unreadable, retried on the next run
+        with conn:
+            if path in indexed:
+                _remove_file(conn, indexed[path][0])
+            mtime, size = current[path]
+            file_id = conn.execute("INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)",
+                                   (path, mtime, size)).lastrowid
+            for page_num, text in enumerate(page_texts, start=1):
+                page_id = conn.execute("INSERT INTO pages (file_id, page) VALUES (?, ?)",
+                                       (file_id, page_num)).lastrowid
+                conn.execute("INSERT INTO pages_fts (rowid, text) VALUES (?, ?)", (page_id, text))
+        indexed_count += 1
+        print(f"[{count}/{len(to_index)}] Indexed {path} ({len(page_texts)} pages)")
+
+    if executor is not None:
+        executor.shutdown()
+    conn.close()
+    return indexed_count, len(current) - len(to_index), len(removed)
+
+def query_index(query, db_path=INDEX_DB_DEFAULT, limit=20):
+    """Run an FTS5 query (words, "exact phrases", AND/OR/NOT) against the index.
+
+    Returns a list of (path, page, snippet), best matches first.
+    """
+    if not os.path.exists(db_path):
+        # open_index would create an empty index and report no results
+        raise FileNotFoundError(f"Index '{db_path}' not found")
+    conn = open_index(db_path)
+    rows = conn.execute("""
+        SELECT files.path, pages.page, snippet(pages_fts, 0, '[', ']', '...', 12)
+        FROM pages_fts
+        JOIN pages ON pages.id = pages_fts.rowid
+        JOIN files ON files.id = pages.file_id
+        WHERE pages_fts MATCH ?
+        ORDER BY pages_fts.rank
+        LIMIT ?
+    """, (query, limit)).fetchall()
+    conn.close()
+    return rows
+
+def index_main(argv):
+    """Handle the index and query subcommands."""
+    parser = argparse.ArgumentParser(
+        prog='pdf_keyword_search.py',
+        description='Build or query a full-text index of PDF pages'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    index_parser = subparsers.add_parser('index', help='Create or incrementally update the index for a folder')
+    index_parser.add_argument('folder_path', help='Folder with the PDF files')
+    index_parser.add_argument('-r', '--recursive', action='store_true', help='Also index subdirectories')
+    index_parser.add_argument('-w', '--workers', type=int, default=1, help='Number of worker processes extracting text')
+    index_parser.add_argument('--db', default=INDEX_DB_DEFAULT, help=f'Index file (default: {INDEX_DB_DEFAULT})')
+    query_parser = subparsers.add_parser('query', help='Search the index')
+    query_parser.add_argument('query', help='Words or "quoted phrases" (SQLite FTS5 syntax)')
+    query_parser.add_argument('-n', '--limit', type=int, default=20, help='Maximum number of results (default: 20)')
+    query_parser.add_argument('--db', default=INDEX_DB_DEFAULT, help=f'Index file (default: {INDEX_DB_DEFAULT})')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'index':
+        indexed, unchanged, removed = build_index(args.folder_path, args.db, args.recursive, args.workers)
+        print(f"\n{indexed} files indexed, {unchanged} unchanged, {removed} removed "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        if not os.path.exists(args.db):
+            print(f"Error: Index '{args.db}' not found, build it with: pdf_keyword_search.py index <folder>")
+            sys.exit(1)
+        try:
+            results = query_index(args.query, args.db, args.limit)
+        except sqlite3.OperationalError as e:
+            print(f"Invalid query: {e}")
+            sys.exit(1)
+        for path, page, snippet in results:
+            print(f"{path} (page {page}): {snippet}")
+        print(f"\n{len(results)} results in {(time.perf_counter() - start) * 1000:.0f} ms")
+
 #TODO: Add an API call to Sabiá-3 to get a summary of the files that contain the keyword
 def get_sabia_summary(folder_path, keyword):
     pass
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python pdf_keyword_search.py [folder_path] [keyword]")
-        sys.exit(1)
+    if len(sys.argv) > 1 and sys.argv[1] in ('index', 'query'):
+        index_main(sys.argv[1:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(
+        description='Find PDF files containing any of the given keywords',
+        epilog='Full-text index: pdf_keyword_search.py index <folder> / pdf_keyword_search.py query "<terms>"'
+    )
+    parser.add_argument('folder_path', help='Folder with the PDF files')
+    parser.add_argument('keywords', nargs='+', help='Keywords to look for (all searched in a single pass)')
+    parser.add_argument('-i', '--ignore-case', action='store_true', help='Case-insensitive matching')
+    parser.add_argument(
+        '-n', '--normalize',
+        action='store_true',
+        help='Ignore accents, case and line-break hyphenation (e.g. "prescrição" matches "PRESCRICAO")'
+    )
+    parser.add_argument('-r', '--recursive', action='store_true', help='Also search subdirectories')
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help=f'Number of worker processes scanning files in parallel (default: 1, this machine has {os.cpu_count()} cores)'
+    )
+    args = parser.parse_args()
 
-    folder_path = sys.argv[1]
-    keyword = sys.argv[2]
-    matching_files = find_keyword_in_pdfs(folder_path, keyword)
+    print("Files containing the keywords:")
+    start = time.perf_counter()
+    files_scanned = 0
+    pages_scanned = 0
+    files_matched = 0
+    for file, terms, pages_read in iter_keyword_matches(args.folder_path, args.keywords,
+                                                        case_sensitive=not args.ignore_case,
+                                                        workers=args.workers, recursive=args.recursive,
+                                                        normalize=args.normalize):
+        files_scanned += 1
+        pages_scanned += pages_read
+        if terms:
+            files_matched += 1
+            print(f"{file} ({', '.join(terms)})", flush=True)
+    elapsed = time.perf_counter() - start
 
-    print("Files containing the keyword:")
-    for file in matching_files:
-        print(file)
+    print(f"\n{files_matched} of {files_scanned} files matched")
+    if elapsed > 0:
+        print(f"Scanned {files_scanned} files / {pages_scanned} pages in {elapsed:.1f}s "
+              f"({files_scanned / elapsed:.1f} files/s, {pages_scanned / elapsed:.1f} pages/s)")
@@ -1,69 +1,384 @@
 import pytesseract
-from pdf2image import convert_from_path
+import PyPDF2
+from pdf2image import convert_from_path, pdfinfo_from_path
+from concurrent.futures import ProcessPoolExecutor
+from cache_utils import CACHE_DIR_DEFAULT, hash_file
+from keyword_matcher import KeywordMatcher
+import argparse
+import sqlite3
 import re
 import sys
 import os
+import time
 
-def ocr_pdf_and_find_keywords(pdf_path, keywords):
-    """OCR a PDF and find paragraphs mentioning specific keywords."""
-    
-    # Set Tesseract path (common Windows installation path)
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# Common Windows installation path for Tesseract
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+DPI = 300  # 300 DPI for good quality
+CHUNK_SIZE = 4  # pages rendered at a time in streaming mode
+LANG = 'eng'  # Tesseract's default language
+CACHE_MAX_MB = 512
+MIN_TEXT_CHARS = 50  # pages with less extractable text than this are OCR'd in hybrid mode
+
+class OCRCache:
+    """Per-page OCR text cache stored in SQLite, with LRU eviction by size.
+
+    Pages are keyed by the PDF's content hash, page number, DPI and the
+    Tesseract language/config, so renaming or moving a file keeps its cache
+    and changing any OCR setting never returns stale text.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR_DEFAULT, max_mb=CACHE_MAX_MB):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'ocr_cache.sqlite3')
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                file_hash TEXT, page INTEGER, dpi INTEGER, lang TEXT, config TEXT,
+                text TEXT, size INTEGER, last_used REAL,
+                PRIMARY KEY (file_hash, page, dpi, lang, config)
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, mtime REAL, size INTEGER, file_hash TEXT, num_pages INTEGER
+            );
+        """)
+
+    def document_info(self, pdf_path):
+        """Return (file_hash, num_pages), hashing the file only if it changed since last seen."""
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT file_hash, num_pages FROM files WHERE path = ? AND mtime = ? AND size = ?",
+            (path, stat.st_mtime, stat.st_size)
+        ).fetchone()
+        if row:
+            return row
+        file_hash = hash_file(path)
+        num_pages = pdfinfo_from_path(path)['Pages']
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_mtime, stat.st_size, file_hash, num_pages)
+            )
+        return file_hash, num_pages
+
+    def get_pages(self, file_hash, dpi, lang, config):
+        """Return {page_number: text} for every cached page of a document."""
+        key = (file_hash, dpi, lang, config)
+        rows = self.conn.execute(
+            "SELECT page, text FROM pages WHERE file_hash = ? AND dpi = ? AND lang = ? AND config = ?", key
+        ).fetchall()
+        if rows:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE pages SET last_used = ? WHERE file_hash = ? AND dpi = ? AND lang = ? AND config = ?",
+                    (time.time(),) + key
+                )
+        return dict(rows)
+
+    def put(self, file_hash, page, dpi, lang, config, text):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_hash, page, dpi, lang, config, text, len(text.encode('utf-8')), time.time())
+            )
+
+    def stats(self):
+        """Return (documents, pages, total_bytes) currently stored."""
+        return self.conn.execute(
+            "SELECT COUNT(DISTINCT file_hash), COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()
+
+    def prune(self, max_bytes=None):
+        """Evict least recently used pages until the cache fits in max_bytes. Returns pages removed."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self.stats()[2]
+        if total <= max_bytes:
+            return 0
+        to_delete = []
+        for rowid, size in self.conn.execute("SELECT rowid, size FROM pages ORDER BY last_used"):
+            if total <= max_bytes:
+                break
+            to_delete.append((rowid,))
+            total -= size
+        with self.conn:
+            self.conn.executemany("DELETE FROM pages WHERE rowid = ?", to_delete)
+        self.conn.execute("VACUUM")
+        return len(to_delete)
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM pages")
+            self.conn.execute("DELETE FROM files")
+        self.conn.execute("VACUUM")
+
+    def close(self):
+        self.conn.close()
+
+def _ocr_page(pdf_path, page_number, dpi=DPI, lang=LANG, config=''):
+    """Rasterize and OCR a single page (runs inside a worker process)."""
+    # Worker processes don't inherit the setting on Windows (spawn), so set it here
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    images = convert_from_path(pdf_path, dpi, first_page=page_number, last_page=page_number)
+    return pytesseract.image_to_string(images[0], lang=lang, config=config)
+
+def _page_windows(page_numbers, chunk_size):
+    """Group sorted page numbers into contiguous (first, last) windows of at most chunk_size pages."""
+    window = []
+    for page in page_numbers:
+        if window and (page != window[-1] + 1 or len(window) == chunk_size):
+            yield window[0], window[-1]
+            window = []
+        window.append(page)
+    if window:
+        yield window[0], window[-1]
+
+def iter_page_images(pdf_path, dpi=DPI, chunk_size=CHUNK_SIZE, page_numbers=None):
+    """Yield (page_number, image), rendering at most chunk_size pages at a time.
+
+    Each image is closed once the caller is done with it, so peak memory
+    depends on chunk_size and not on the number of pages in the document.
+    page_numbers restricts rendering to those pages (default: all of them).
+    """
+    if page_numbers is None:
+        page_numbers = range(1, pdfinfo_from_path(pdf_path)['Pages'] + 1)
+    for first_page, last_page in _page_windows(page_numbers, chunk_size):
+        images = convert_from_path(pdf_path, dpi, first_page=first_page, last_page=last_page)
+        for offset, image in enumerate(images):
+            yield first_page + offset, image
+            image.close()
+        del images
+
+def extract_text_layer(pdf_path, page_numbers, min_text_chars=MIN_TEXT_CHARS):
+    """Return {page_number: text} for the given pages that already carry a usable text layer."""
+    texts = {}
+    with open(pdf_path, 'rb') as file:
+        try:
+            pdf_reader = PyPDF2.PdfReader(file)
+        except Exception:
+            return texts  # PyPDF2 can't open it (broken xref, encryption), poppler may: OCR every page
+        for page_number in page_numbers:
+            try:
+                text = pdf_reader.pages[page_number - 1].extract_text() or ""
+            except Exception:
+                continue  # Broken text layer, leave the page to OCR
+            if len(text.strip()) >= min_text_chars:
+                texts[page_number] = text
+    return texts
+
+def ocr_pages(pdf_path, workers=1, dpi=DPI, stream=False, chunk_size=CHUNK_SIZE,
+              lang=LANG, config='', cache=None, hybrid=False, min_text_chars=MIN_TEXT_CHARS):
+    """OCR every page of a PDF and return the page texts in page order.
+
+    With workers > 1 the pages are fanned out to a process pool; each worker
+    renders only the page it was given, so page images never cross processes.
+    With stream=True a single process renders chunk_size pages at a time
+    instead of holding the whole document in memory.
+    With a cache, pages OCR'd by a previous run are read back instead of
+    being rendered again.
+    With hybrid=True, pages whose text layer has at least min_text_chars
+    characters are taken from the PDF as-is and only the rest are OCR'd.
+    """
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    start = time.perf_counter()
+
+    if cache is not None:
+        file_hash, num_pages = cache.document_info(pdf_path)
+        texts = cache.get_pages(file_hash, dpi, lang, config)
+        if texts:
+            print(f"Loaded {len(texts)}/{num_pages} pages from the OCR cache")
+    else:
+        num_pages = pdfinfo_from_path(pdf_path)['Pages']
+        texts = {}
+    missing = [page for page in range(1, num_pages + 1) if page not in texts]
+
+    if hybrid and missing:
+        text_layer = extract_text_layer(pdf_path, missing, min_text_chars)
+        texts.update(text_layer)
+        missing = [page for page in missing if page not in text_layer]
+        print(f"{len(text_layer)} pages have a text layer, {len(missing)} pages need OCR")
+
+    def store(page_number, page_text):
+        texts[page_number] = page_text
+        if cache is not None:
+            cache.put(file_hash, page_number, dpi, lang, config, page_text)
+
+    if missing and workers > 1:
+        print(f"OCR'ing {len(missing)} pages with {workers} workers...")
+        n = len(missing)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # executor.map yields results in submission order, so page order is kept
+            results = executor.map(_ocr_page, [pdf_path] * n, missing, [dpi] * n, [lang] * n, [config] * n)
+            for page_number, page_text in zip(missing, results):
+                print(f"Processed page {page_number}/{num_pages}")
+                store(page_number, page_text)
+    elif missing:
+        if stream:
+            print(f"Streaming PDF pages in chunks of {chunk_size}...")
+        else:
+            print(f"Converting PDF to images...")
+            chunk_size = num_pages
+        for page_number, image in iter_page_images(pdf_path, dpi, chunk_size, missing):
+            print(f"Processing page {page_number}/{num_pages}...")
+            store(page_number, pytesseract.image_to_string(image, lang=lang, config=config))
+
+    if cache is not None and missing:
+        cache.prune()
+
+    elapsed = time.perf_counter() - start
+    rate = len(missing) / elapsed if elapsed > 0 else 0.0
+    print(f"OCR'd {len(missing)} pages in {elapsed:.1f}s ({rate:.2f} pages/s)")
+    return [texts[page] for page in range(1, num_pages + 1)]
+
+def ocr_pdf_and_find_keywords(pdf_path, keywords, workers=1, stream=False, chunk_size=CHUNK_SIZE,
+                              lang=LANG, config='', cache=None, hybrid=False, min_text_chars=MIN_TEXT_CHARS,
+                              normalize=False):
+    """OCR a PDF and find paragraphs mentioning specific keywords.
+
+    With normalize=True paragraphs and keywords are also folded for accents
+    and line-break hyphenation, not just lowercased.
+    """
     
     # Check if PDF file exists
     if not os.path.exists(pdf_path):
         return None, f"Error: PDF file not found at {pdf_path}"
     
     try:
-        print(f"Converting PDF to images...")
-        pages = convert_from_path(pdf_path, 300)  # 300 DPI for good quality
+        page_texts = ocr_pages(pdf_path, workers=workers, stream=stream, chunk_size=chunk_size,
+                               lang=lang, config=config, cache=cache,
+                               hybrid=hybrid, min_text_chars=min_text_chars)
         
         all_text = ""
-        for i, page in enumerate(pages):
-            print(f"Processing page {i+1}/{len(pages)}...")
-            page_text = pytesseract.image_to_string(page)  # Default English
+        for i, page_text in enumerate(page_texts):
             all_text += f"\n--- PAGE {i+1} ---\n" + page_text
         
         # Split text into paragraphs (double newlines or significant spacing)
         paragraphs = re.split(r'\n\s*\n', all_text)
         
-        # Prepare search terms (case-insensitive)
-        search_terms = [keyword.lower() for keyword in keywords]
+        # Build the matcher once; each paragraph is then scanned a single time for all keywords
+        matcher = KeywordMatcher(keywords, normalize=normalize)
         
         # Find paragraphs mentioning the keywords
         matching_paragraphs = []
         for i, paragraph in enumerate(paragraphs):
-            paragraph_lower = paragraph.lower()
-            for term in search_terms:
-                if term in paragraph_lower:
-                    matching_paragraphs.append({
-                        'paragraph_number': i+1,
-                        'content': paragraph.strip(),
-                        'matched_term': term
-                    })
-                    break  # Don't add the same paragraph multiple times
+            matched_terms = matcher.find_terms(paragraph)
+            if matched_terms:
+                matching_paragraphs.append({
+                    'paragraph_number': i+1,
+                    'content': paragraph.strip(),
+                    'matched_term': matched_terms[0],
+                    'matched_terms': matched_terms
+                })
         
         return all_text, matching_paragraphs
     
     except Exception as e:
         return None, f"Error: {str(e)}"
 
+def cache_main(argv):
+    """Inspect, prune or clear the OCR cache: python pdf_ocr_search.py cache <action>."""
+    parser = argparse.ArgumentParser(
+        prog='pdf_ocr_search.py cache',
+        description='Inspect and prune the on-disk OCR cache'
+    )
+    parser.add_argument('action', choices=['stats', 'prune', 'clear'], help='What to do with the cache')
+    parser.add_argument('--cache-dir', default=CACHE_DIR_DEFAULT, help=f'Cache directory (default: {CACHE_DIR_DEFAULT})')
+    parser.add_argument(
+        '--max-mb',
+        type=float,
+        default=CACHE_MAX_MB,
+        help=f'Size limit used by prune (default: {CACHE_MAX_MB})'
+    )
+    args = parser.parse_args(argv)
+
+    cache = OCRCache(args.cache_dir, args.max_mb)
+    if args.action == 'prune':
+        removed = cache.prune()
+        print(f"Removed {removed} least recently used pages")
+    elif args.action == 'clear':
+        cache.clear()
+        print("OCR cache cleared")
+    documents, pages, total_bytes = cache.stats()
+    print(f"Cache: {cache.path}")
+    print(f"{documents} documents, {pages} pages, {total_bytes / (1024 * 1024):.1f} MB (limit {args.max_mb} MB)")
+    cache.close()
+
 def main():
     """Main function to handle user input and execute OCR search."""
     
-    if len(sys.argv) < 3:
-        print("Usage: python pdf_ocr_search.py <pdf_path> <keyword1> [keyword2] [keyword3] ...")
-        print("Example: python pdf_ocr_search.py 'document.pdf' 'John Smith' 'contract' 'payment'")
-        sys.exit(1)
+    if len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        cache_main(sys.argv[2:])
+        return
+    
+    parser = argparse.ArgumentParser(
+        description='OCR a PDF and find paragraphs mentioning specific keywords',
+        epilog="Example: python pdf_ocr_search.py 'document.pdf' 'John Smith' 'contract' 'payment'\n"
+               "Cache maintenance: python pdf_ocr_search.py cache {stats,prune,clear}",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('pdf_path', help='Path to the PDF to OCR')
+    parser.add_argument('keywords', nargs='+', help='Keywords to look for')
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help=f'Number of OCR worker processes (default: 1, this machine has {os.cpu_count()} cores)'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Render and OCR pages in small chunks instead of loading the whole PDF into memory'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=CHUNK_SIZE,
+        help=f'Pages rendered at a time with --stream (default: {CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--hybrid',
+        action='store_true',
+        help='Use the PDF text layer where one exists and OCR only the scanned pages'
+    )
+    parser.add_argument(
+        '--min-text-chars',
+        type=int,
+        default=MIN_TEXT_CHARS,
+        help=f'Characters a page text layer needs to skip OCR with --hybrid (default: {MIN_TEXT_CHARS})'
+    )
+    parser.add_argument(
+        '--normalize',
+        action='store_true',
+        help='Also ignore accents and line-break hyphenation (e.g. "prescrição" matches "PRESCRICAO")'
+    )
+    parser.add_argument('--lang', default=LANG, help=f'Tesseract language(s), e.g. por or por+eng (default: {LANG})')
+    parser.add_argument('--tess-config', default='', help='Extra Tesseract options, e.g. "--psm 6"')
+    parser.add_argument('--no-cache', action='store_true', help='Always OCR from scratch and skip the OCR cache')
+    parser.add_argument('--cache-dir', default=CACHE_DIR_DEFAULT, help=f'OCR cache directory (default: {CACHE_DIR_DEFAULT})')
+    parser.add_argument(
+        '--cache-max-mb',
+        type=float,
+        default=CACHE_MAX_MB,
+        help=f'OCR cache size limit; least recently used pages are evicted (default: {CACHE_MAX_MB})'
+    )
+    args = parser.parse_args()
     
-    pdf_path = sys.argv[1]
-    keywords = sys.argv[2:]
+    pdf_path = args.pdf_path
+    keywords = args.keywords
     
     print(f"Starting OCR for: {pdf_path}")
     print(f"Looking for keywords: {', '.join(keywords)}")
     print("=" * 60)
 
-    full_text, results = ocr_pdf_and_find_keywords(pdf_path, keywords)
+    cache = None if args.no_cache else OCRCache(args.cache_dir, args.cache_max_mb)
+    full_text, results = ocr_pdf_and_find_keywords(pdf_path, keywords, workers=args.workers,
+                                                     stream=args.stream, chunk_size=args.chunk_size,
+                                                     lang=args.lang, config=args.tess_config, cache=cache,
+                                                     hybrid=args.hybrid, min_text_chars=args.min_text_chars,
+                                                     normalize=args.normalize)
+    if cache is not None:
+        cache.close()
 
     if isinstance(results, str):  # Error occurred
         print(results)
@@ -72,7 +387,8 @@ def main():
         print(f"\nFound {len(results)} paragraphs mentioning the keywords:\n")
         
         for match in results:
-            print(f"PARAGRAPH {match['paragraph_number']} (matched: '{match['matched_term']}'):")
+            matched = ', '.join(f"'{term}'" for term in match['matched_terms'])
+            print(f"PARAGRAPH {match['paragraph_number']} (matched: {matched}):")
             print("-" * 40)
             print(match['content'])
             print("\n" + "=" * 60 + "\n")
@@ -83,4 +399,4 @@ def main():
             print(full_text[:1000] if full_text else "No text extracted")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
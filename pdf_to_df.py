@@ -1,43 +1,250 @@
 #Script to parse trough multiple pdf files and convert them to raw text
 
 import tika, pandas as pd, os, glob
+import argparse
+import json
+import re
+import PyPDF2
+import pdfplumber
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from tika import parser
 
+BACKENDS = ('tika', 'pypdf2', 'pdfplumber')
+BATCH_SIZE = 256  # rows buffered before each write to Parquet/Arrow
+
+#Column -> metadata keys, tika names first, then PDF document info names (pypdf2/pdfplumber)
+METADATA_KEYS = {
+    'file_name': ('resourceName',),
+    'title': ('dc:title', 'title', 'Title'),
+    'author': ('dc:creator', 'Author', 'meta:author'),
+    'subject': ('dc:subject', 'subject', 'Subject'),
+    'creator': ('xmp:CreatorTool', 'Creator'),
+    'producer': ('pdf:producer', 'producer', 'Producer'),
+    'created': ('dcterms:created', 'Creation-Date', 'CreationDate'),
+    'modified': ('dcterms:modified', 'Last-Modified', 'ModDate'),
+    'pages': ('xmpTPg:NPages', 'NPages'),
+}
+
+#PDF date string, e.g. D:20240315143000-03'00'
+PDF_DATE = re.compile(r"D:(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?([Zz+-])?(\d{2})?'?(\d{2})?")
+
+
+#tika backend: one HTTP round-trip to the Tika server (JVM) per file
+def parse_with_tika(path):
+    parsed = parser.from_file(path)
+    return parsed['metadata'], parsed['content']
+
+#in-process backends: metadata keys follow PDF's document info ('/Author' -> 'Author')
+#a file that can't be read returns None (skipped by iter_pdfs) instead of aborting the whole folder
+def parse_with_pypdf2(path):
+    try:
+        with open(path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            metadata = {key.lstrip('/'): str(value) for key, value in (pdf_reader.metadata or {}).items()}
+            metadata['resourceName'] = os.path.basename(path)
+            metadata['NPages'] = len(pdf_reader.pages)
+            content = '\n'.join(page.extract_text() or '' for page in pdf_reader.pages)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+    return metadata, content
+
+def parse_with_pdfplumber(path):
+    try:
+        with pdfplumber.open(path) as pdf:
+            metadata = {key: str(value) for key, value in pdf.metadata.items()}
+            metadata['resourceName'] = os.path.basename(path)
+            metadata['NPages'] = len(pdf.pages)
+            content = '\n'.join(page.extract_text() or '' for page in pdf.pages)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+    return metadata, content
+
+PARSERS = {
+    'tika': parse_with_tika,
+    'pypdf2': parse_with_pypdf2,
+    'pdfplumber': parse_with_pdfplumber,
+}
+
+
+#yield (metadata, content) for each pdf as soon as it is parsed, in file order; unreadable pdfs are skipped
+def iter_pdfs(file_path, backend='tika', workers=1):
+    parse = PARSERS[backend]
+    files = sorted(glob.glob(os.path.join(glob.escape(file_path), '*.pdf')))
+    if workers > 1 and backend != 'tika':
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from (parsed for parsed in executor.map(parse, files, chunksize=4) if parsed is not None)
+    else:
+        yield from (parsed for parsed in map(parse, files) if parsed is not None)
 
 #create function to parse through data with tika and return metadata and text
-def pdf_to_list(file_path):
+def pdf_to_list(file_path, backend='tika', workers=1):
     """loops through a file and converts pdfs to its metadata and raw texts
-        input: file_path given by user
+        input: file_path given by user, backend (tika, pypdf2 or pdfplumber)
+               and number of worker processes for the in-process backends
         output: metadata list and raw text list"""
-    os.chdir(file_path)
     metadata_l = []
     content_l = []
-    for file in glob.glob('*.pdf'):
-        parsed = parser.from_file(file)
-        metadata_l.append(parsed['metadata'])
-        content_l.append(parsed['content'])
+    for metadata, content in iter_pdfs(file_path, backend, workers):
+        metadata_l.append(metadata)
+        content_l.append(content)
     return metadata_l, content_l
-            
+
 #create Dataframe from data
 def list_to_df(metadata_list, text_list):
     """takes two lists and converts them to a Pandas DataFrame"""
-    df = pd.DataFrame(metadata_list, text_list, columns=['Metadata', 'Text'])
+    df = pd.DataFrame({'Metadata': metadata_list, 'Text': text_list})
     return df
 
-fpath = input('Enter file path: ')
+def parse_date(value):
+    """converts a PDF (D:YYYYMMDDHHmmSS+HH'mm') or ISO date string to a UTC timestamp, None if it can't"""
+    if not value:
+        return None
+    match = PDF_DATE.match(value)
+    if match:
+        year, month, day, hour, minute, second, sign, tz_hour, tz_minute = match.groups()
+        value = f"{year}-{month or '01'}-{day or '01'}T{hour or '00'}:{minute or '00'}:{second or '00'}"
+        if sign in ('+', '-'):
+            value += f"{sign}{tz_hour or '00'}:{tz_minute or '00'}"
+    try:
+        timestamp = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.tz_convert('UTC').to_pydatetime()
+
+def flatten_metadata(metadata, content):
+    """turns one parsed pdf into a row matching arrow_schema()"""
+    metadata = dict(metadata or {})
+    row = {}
+    for column, keys in METADATA_KEYS.items():
+        value = None
+        for key in keys:
+            if key in metadata:
+                value = metadata.pop(key)
+                break
+        if isinstance(value, list):  # tika returns repeated fields as lists
+            value = value[0] if value else None
+        row[column] = value
+    for key in METADATA_KEYS['created'] + METADATA_KEYS['modified'] + METADATA_KEYS['pages']:
+        metadata.pop(key, None)  # aliases of columns already filled
+    for column in ('file_name', 'title', 'author', 'subject', 'creator', 'producer'):
+        row[column] = None if row[column] is None else str(row[column])
+    row['created'] = parse_date(row['created'])
+    row['modified'] = parse_date(row['modified'])
+    try:
+        row['pages'] = int(row['pages'])
+    except (TypeError, ValueError):
+        row['pages'] = None
+    row['text'] = content
+    row['metadata_json'] = json.dumps(metadata, ensure_ascii=False, default=str)
+    return row
+
+#Typed columns for the columnar output; metadata not covered here goes to metadata_json
+#pyarrow is only needed for the columnar output, so it is imported here and not at the top
+def arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('file_name', pa.string()),
+        ('title', pa.string()),
+        ('author', pa.string()),
+        ('subject', pa.string()),
+        ('creator', pa.string()),
+        ('producer', pa.string()),
+        ('created', pa.timestamp('us', tz='UTC')),
+        ('modified', pa.timestamp('us', tz='UTC')),
+        ('pages', pa.int32()),
+        ('text', pa.string()),
+        ('metadata_json', pa.string()),
+    ])
+
+def pdf_to_columnar(file_path, output_path, backend='tika', workers=1, batch_size=BATCH_SIZE):
+    """extracts every pdf in file_path straight to a compressed Parquet (.parquet) or
+        Arrow IPC (.arrow/.feather) file, batch_size rows at a time, so memory use
+        does not grow with the number of documents
+        output: number of rows written (needs pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = arrow_schema()
+    if output_path.endswith('.parquet'):
+        writer = pq.ParquetWriter(output_path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(output_path, schema,
+                                 options=pa.ipc.IpcWriteOptions(compression='zstd'))
+    rows = []
+    total = 0
+    try:
+        for metadata, content in iter_pdfs(file_path, backend, workers):
+            rows.append(flatten_metadata(metadata, content))
+            if len(rows) >= batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                total += len(rows)
+                print(f"{total} documents written to {output_path}")
+                rows = []
+    finally:
+        #also on an error mid-run, so documents already parsed are not lost
+        if rows:
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            total += len(rows)
+        writer.close()
+    return total
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Extract metadata and raw text from every PDF in a folder')
+    arg_parser.add_argument('file_path', nargs='?', help='Folder with the PDF files (asked for if omitted)')
+    arg_parser.add_argument(
+        '-b', '--backend',
+        choices=BACKENDS,
+        default='tika',
+        help='tika (needs a Tika server/JVM) or the in-process pypdf2/pdfplumber extractors (default: tika)'
+    )
+    arg_parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes for the in-process backends (default: number of cores)'
+    )
+    arg_parser.add_argument(
+        '-o', '--output',
+        help='Write results to this .parquet or .arrow/.feather file in batches instead of printing a preview (needs pyarrow)'
+    )
+    arg_parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=BATCH_SIZE,
+        help=f'Documents per write with --output (default: {BATCH_SIZE})'
+    )
+    args = arg_parser.parse_args()
+
+    if args.output:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: --output needs the pyarrow package (pip install pyarrow).")
+            sys.exit(1)
+
+    fpath = args.file_path or input('Enter file path: ')
 
-metadata_list, text_list = pdf_to_list(fpath)
+    if args.output:
+        total = pdf_to_columnar(fpath, args.output, backend=args.backend, workers=args.workers,
+                                batch_size=args.batch_size)
+        print(f"Done! {total} documents saved to {args.output}")
+    else:
+        metadata_list, text_list = pdf_to_list(fpath, backend=args.backend, workers=args.workers)
 
-#TODO: save df as csv 
+        #TODO: save df as csv
 
-#TODO: save txt file with content only
+        #TODO: save txt file with content only
 
 
-#out_path = input('Enter folder path to save csv: ')
-#data.to_csv(os.path.join(out_path, 'pdf_data.csv'))
+        #out_path = input('Enter folder path to save csv: ')
+        #data.to_csv(os.path.join(out_path, 'pdf_data.csv'))
 
-#DEBUGGER
-#print(metadata_list[0])
-#print(text_list[0])
-data = list_to_df(metadata_list, text_list)
-print(data.head())
\ No newline at end of file
+        #DEBUGGER
+        #print(metadata_list[0])
+        #print(text_list[0])
+        data = list_to_df(metadata_list, text_list)
+        print(data.head())
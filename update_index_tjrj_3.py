@@ -1,11 +1,19 @@
 import re
+import argparse
+import csv
+import io
+import json
+import time
 import pandas as pd
 import pdfplumber
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
 from datetime import datetime
 import os
 import sys
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter, column_index_from_string
+from cache_utils import CACHE_DIR_DEFAULT, hash_file
 
 def extract_correction_factors(pdf_path, debug=False):
     """Extract monthly correction factors from the PDF."""
@@ -48,23 +56,136 @@ def extract_correction_factors(pdf_path, debug=False):
     
     return correction_factors
 
-def find_column_indices(sheet, column_name):
+def factors_cache_path(pdf_path, cache_dir=CACHE_DIR_DEFAULT):
+    """Return the cache file for this PDF's contents: one JSON file per PDF in cache_dir, keyed by
+    its SHA-256, so a renamed or copied PDF hits the same entry."""
+    return os.path.join(cache_dir, f"tjrj_factors_{hash_file(pdf_path)}.json")
+
+def load_factors_cache(cache_path):
+    """Read a cached factor table, or return None if it is missing or unreadable."""
+    try:
+        with open(cache_path, encoding='utf-8') as file:
+            data = json.load(file)
+        # Stored as {"YYYY-MM": factor}
+        return {(int(key[5:7]), int(key[:4])): factor for key, factor in data['factors'].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def save_factors_cache(cache_path, correction_factors, pdf_path):
+    """Write the factor table to the cache, through a temporary file so readers never see half of it."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    data = {
+        'source': os.path.abspath(pdf_path),
+        'extracted_at': datetime.now().isoformat(timespec='seconds'),
+        'factors': {f"{year:04d}-{month:02d}": factor
+                    for (month, year), factor in sorted(correction_factors.items(), key=lambda item: item[0][::-1])},
+    }
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, separators=(',', ':'))
+    os.replace(tmp_path, cache_path)
+
+def load_correction_factors(pdf_path, cache_dir=CACHE_DIR_DEFAULT, refresh=False, debug=False):
+    """Return the correction factors of a PDF, extracting them only the first time.
+
+    The (month, year) -> factor table is cached by the PDF's SHA-256, so a
+    new monthly report is extracted once and every later run with it starts
+    without opening the PDF. refresh=True re-extracts and overwrites the cache.
+    """
+    cache_path = factors_cache_path(pdf_path, cache_dir)
+    if not refresh:
+        correction_factors = load_factors_cache(cache_path)
+        if correction_factors:
+            print(f"Loaded {len(correction_factors)} correction factors from cache {cache_path}")
+            return correction_factors
+
+    correction_factors = extract_correction_factors(pdf_path, debug)
+    if correction_factors:
+        save_factors_cache(cache_path, correction_factors, pdf_path)
+        print(f"Cached correction factors in {cache_path}")
+    return correction_factors
+
+def header_index(sheet):
+    """Map each header in row 1 to the columns (1-based) where it appears, in a single pass."""
+    headers = {}
+    first_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    for col_idx, cell_value in enumerate(first_row, start=1):
+        headers.setdefault(cell_value, []).append(col_idx)
+    return headers
+
+def find_column_indices(sheet, column_name, headers=None):
     """Find all occurrences of a column name in the sheet."""
-    indices = []
-    
-    # Iterate through all cells in row 1
-    for col_idx in range(1, sheet.max_column + 1):
-        cell_value = sheet.cell(row=1, column=col_idx).value
-        if cell_value == column_name:
-            indices.append(col_idx)
+    if headers is None:
+        headers = header_index(sheet)
+    return headers.get(column_name, [])
+
+def table_columns(headers, date_column, rate_column):
+    """Pair every date column with the closest rate column.
+
+    Returns a list of (date_col_idx, rate_col_idx) tuples, with rate_col_idx
+    None when the sheet has no rate column at all.
+    """
+    rate_col_indices = headers.get(rate_column, [])
+    return [(date_col_idx, min(rate_col_indices, key=lambda x: abs(x - date_col_idx)) if rate_col_indices else None)
+            for date_col_idx in headers.get(date_column, [])]
+
+def month_year(date_value):
+    """Return (month, year) of a date cell value, or None if it isn't a date."""
+    if isinstance(date_value, str):
+        try:
+            date_value = datetime.strptime(date_value, '%d/%m/%Y')
+        except ValueError:
+            try:
+                # Try with other common formats
+                date_value = pd.to_datetime(date_value).to_pydatetime()
+            except:
+                return None
+    if hasattr(date_value, 'month') and hasattr(date_value, 'year'):
+        return (date_value.month, date_value.year)
+    return None
+
+def update_table(sheet, date_col_idx, rate_col_idx, correction_factors, max_row, parsed_dates=None, debug=False):
+    """Write the factor of each row's month into the rate column; returns (updated, not found) row counts.
+
+    parsed_dates maps date cell values to (month, year) and is shared
+    between tables, since the same dates repeat across rows.
+    """
+    if parsed_dates is None:
+        parsed_dates = {}
+    updated_count = 0
+    not_found_count = 0
     
-    return indices
+    # Start from row 2 (assuming row 1 is header)
+    for row_idx in range(2, max_row + 1):
+        date_value = sheet.cell(row=row_idx, column=date_col_idx).value
+        if not date_value:
+            continue
+        
+        if date_value not in parsed_dates:
+            parsed_dates[date_value] = month_year(date_value)
+        key = parsed_dates[date_value]
+        if key is None:
+            if debug:
+                print(f"  Row {row_idx} has a value that is not a date: {date_value}")
+            continue
+        
+        # Look up correction factor
+        if key in correction_factors:
+            # Update the cell while preserving formatting
+            sheet.cell(row=row_idx, column=rate_col_idx, value=correction_factors[key])
+            updated_count += 1
+        else:
+            not_found_count += 1
+            if debug:
+                print(f"  No factor found for: {key[0]}/{key[1]}")
+    return updated_count, not_found_count
 
-def update_excel_with_openpyxl(excel_path, correction_factors, output_path, sheet_mappings, debug=False):
+def update_excel_with_openpyxl(excel_path, correction_factors, output_path, sheet_mappings, debug=False, stats=None):
     """Update the Excel spreadsheet with correction factors while preserving formatting and formulas.
     
     Args:
         sheet_mappings: List of tuples (sheet_name, date_column, rate_column) for each table to update
+        stats: Optional dict filled with the number of tables, rows updated and rows without factors
     """
     try:
         # Load the workbook
@@ -72,6 +193,10 @@ def update_excel_with_openpyxl(excel_path, correction_factors, output_path, shee
         
         total_updated_count = 0
         total_not_found_count = 0
+        table_count = 0
+        parsed_dates = {}
+        # sheet.max_row/max_column scan every cell, so they are read once per sheet with the headers
+        headers_by_sheet = {}
         
         # Process each sheet mapping
         for mapping_idx, (sheet_name, date_column, rate_column) in enumerate(sheet_mappings):
@@ -93,90 +218,35 @@ def update_excel_with_openpyxl(excel_path, correction_factors, output_path, shee
                     continue
                 sheet = wb[sheet_name]
             
-            # Find all occurrences of the date column
-            date_col_indices = find_column_indices(sheet, date_column)
+            # Read the header row once per sheet and pair each date column with its rate column
+            if sheet.title not in headers_by_sheet:
+                headers_by_sheet[sheet.title] = (header_index(sheet), sheet.max_row)
+            headers, max_row = headers_by_sheet[sheet.title]
+            columns = table_columns(headers, date_column, rate_column)
             
-            if not date_col_indices:
+            if not columns:
                 print(f"Warning: Column '{date_column}' not found in sheet '{sheet.title}'")
                 continue
             
-            # For each date column, find the corresponding rate column
-            for date_col_idx in date_col_indices:
-                # Find rate column
-                # First try by name
-                rate_col_indices = find_column_indices(sheet, rate_column)
-                
-                # If we found rate columns, use the one that's closest to the date column
-                if rate_col_indices:
-                    # Find the rate column closest to this date column
-                    rate_col_idx = min(rate_col_indices, key=lambda x: abs(x - date_col_idx))
-                else:
-                    # If not found by name, look for headers in the same row group as the date column
-                    # This assumes the rate column is within a few columns of the date column
-                    found = False
-                    # Look up to 5 columns to the right
-                    for col_offset in range(1, 6):
-                        check_col = date_col_idx + col_offset
-                        if check_col <= sheet.max_column:
-                            cell_value = sheet.cell(row=1, column=check_col).value
-                            if cell_value == rate_column:
-                                rate_col_idx = check_col
-                                found = True
-                                break
-                    
-                    if not found:
-                        print(f"Warning: Could not find '{rate_column}' column near '{date_column}' column at position {date_col_idx}")
-                        continue
+            for date_col_idx, rate_col_idx in columns:
+                if rate_col_idx is None:
+                    print(f"Warning: Could not find '{rate_column}' column near '{date_column}' column at position {date_col_idx}")
+                    continue
                 
                 print(f"  Found table with date column at {date_col_idx} and rate column at {rate_col_idx}")
+                table_count += 1
                 
-                # Process each row
-                updated_count = 0
-                not_found_count = 0
-                
-                # Start from row 2 (assuming row 1 is header)
-                for row_idx in range(2, sheet.max_row + 1):
-                    date_cell = sheet.cell(row=row_idx, column=date_col_idx)
-                    
-                    if date_cell.value:
-                        # Convert to datetime if it's not already
-                        date_value = date_cell.value
-                        if isinstance(date_value, str):
-                            try:
-                                date_value = datetime.strptime(date_value, '%d/%m/%Y')
-                            except ValueError:
-                                try:
-                                    # Try with other common formats
-                                    date_value = pd.to_datetime(date_value).to_pydatetime()
-                                except:
-                                    if debug:
-                                        print(f"  Could not parse date: {date_value} in row {row_idx}")
-                                    continue
-                        
-                        # Extract month and year
-                        if hasattr(date_value, 'month') and hasattr(date_value, 'year'):
-                            month = date_value.month
-                            year = date_value.year
-                            
-                            # Look up correction factor
-                            key = (month, year)
-                            if key in correction_factors:
-                                # Update the cell while preserving formatting
-                                sheet.cell(row=row_idx, column=rate_col_idx, value=correction_factors[key])
-                                updated_count += 1
-                            else:
-                                not_found_count += 1
-                                if debug:
-                                    print(f"  No factor found for: {month}/{year}")
-                        else:
-                            if debug:
-                                print(f"  Row {row_idx} has date value but it's not a proper date: {date_value}")
-                
+                updated_count, not_found_count = update_table(sheet, date_col_idx, rate_col_idx, correction_factors,
+                                                              max_row, parsed_dates, debug)
                 print(f"  Updated {updated_count} rows, could not find factors for {not_found_count} rows")
                 total_updated_count += updated_count
                 total_not_found_count += not_found_count
         
         print(f"\nTotal updates: {total_updated_count} rows updated, {total_not_found_count} rows without matching factors")
+        if stats is not None:
+            stats['tables'] = table_count
+            stats['updated'] = total_updated_count
+            stats['not_found'] = total_not_found_count
         
         # Save updated Excel
         wb.save(output_path)
@@ -188,7 +258,7 @@ def update_excel_with_openpyxl(excel_path, correction_factors, output_path, shee
         traceback.print_exc()
         return None
 
-def main(pdf_path, excel_path, output_path, sheet_mappings, debug=False):
+def main(pdf_path, excel_path, output_path, sheet_mappings, debug=False, cache_dir=CACHE_DIR_DEFAULT):
     """Main function to orchestrate the extraction and update process."""
     # Check if files exist
     if not os.path.exists(pdf_path):
@@ -198,9 +268,9 @@ def main(pdf_path, excel_path, output_path, sheet_mappings, debug=False):
         print(f"Error: Excel file not found at {excel_path}")
         return None
     
-    # Extract correction factors from PDF
+    # Extract correction factors from PDF (or load them from the cache)
     print("Extracting correction factors from PDF...")
-    correction_factors = extract_correction_factors(pdf_path, debug)
+    correction_factors = load_correction_factors(pdf_path, cache_dir, debug=debug)
     print(f"Extracted {len(correction_factors)} correction factors")
     
     if not correction_factors:
@@ -225,6 +295,197 @@ def main(pdf_path, excel_path, output_path, sheet_mappings, debug=False):
     
     return result_path
 
+def refresh_main(pdf_path, debug=False, cache_dir=CACHE_DIR_DEFAULT):
+    """Re-extract a PDF's correction factors and overwrite its cache entry."""
+    if not os.path.exists(pdf_path):
+        print(f"Error: PDF file not found at {pdf_path}")
+        return None
+    correction_factors = load_correction_factors(pdf_path, cache_dir, refresh=True, debug=debug)
+    if not correction_factors:
+        print("No correction factors extracted. Check the PDF format.")
+        return None
+    years = sorted(year for _, year in correction_factors)
+    print(f"Refreshed {len(correction_factors)} correction factors ({years[0]}-{years[-1]})")
+    return correction_factors
+
+# Factor table set once per worker process by _init_worker instead of being pickled with every workbook
+_worker_factors = None
+
+def _init_worker(correction_factors):
+    global _worker_factors
+    _worker_factors = correction_factors
+
+def update_workbook(excel_path, output_path, sheet_mappings, correction_factors=None, debug=False):
+    """Update one workbook for batch mode and return a summary dict.
+
+    The detailed log of update_excel_with_openpyxl is captured instead of
+    printed, so output from parallel workers doesn't interleave; it is
+    returned under 'log'.
+    """
+    if correction_factors is None:
+        correction_factors = _worker_factors
+    stats = {'excel_path': excel_path, 'output_path': output_path, 'tables': 0, 'updated': 0, 'not_found': 0}
+    start = time.perf_counter()
+    log = io.StringIO()
+    with redirect_stdout(log):
+        result = update_excel_with_openpyxl(excel_path, correction_factors, output_path, sheet_mappings, debug, stats)
+    stats['seconds'] = time.perf_counter() - start
+    stats['ok'] = result is not None
+    stats['status'] = 'ok' if stats['ok'] else 'FAILED'
+    stats['log'] = log.getvalue()
+    return stats
+
+def list_workbooks(source, output_dir):
+    """Return (excel_path, output_path) pairs from a folder of workbooks or a manifest file.
+
+    A manifest is a CSV/text file with one workbook per line, optionally
+    followed by its output path: excel_path[,output_path]. Lines starting
+    with # are ignored. Workbooks without an output path are written to
+    output_dir under the same name.
+    """
+    pairs = []
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.startswith('~$'):
+                continue  # Excel lock files
+            if filename.lower().endswith(('.xlsx', '.xlsm')):
+                pairs.append((os.path.join(source, filename), None))
+            elif filename.lower().endswith('.xls'):
+                print(f"Skipping {filename}: .xls files must be converted to .xlsx first")
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, newline='', encoding='utf-8') as file:
+            for row in csv.reader(file):
+                if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                    continue
+                excel_path = os.path.join(base_dir, row[0].strip())
+                output_path = os.path.join(base_dir, row[1].strip()) if len(row) > 1 and row[1].strip() else None
+                pairs.append((excel_path, output_path))
+    return [(excel_path, output_path or os.path.join(output_dir, os.path.basename(excel_path)))
+            for excel_path, output_path in pairs]
+
+def output_conflicts(workbooks):
+    """Return {index: reason} for the (excel_path, output_path) pairs that must not run.
+
+    A workbook can't be written over its own input or over another row's
+    input, and two rows can't share an output path (parallel workers would
+    write the same file, and one result would silently replace the other).
+    """
+    def key(path):
+        return os.path.normcase(os.path.realpath(path))
+
+    inputs = {key(excel_path) for excel_path, _ in workbooks}
+    outputs = {}
+    for idx, (_, output_path) in enumerate(workbooks):
+        outputs.setdefault(key(output_path), []).append(idx)
+
+    conflicts = {}
+    for idx, (excel_path, output_path) in enumerate(workbooks):
+        if key(output_path) == key(excel_path):
+            conflicts[idx] = f"output path is the input workbook itself ({output_path})"
+        elif key(output_path) in inputs:
+            conflicts[idx] = f"output path {output_path} is another input workbook"
+        elif len(outputs[key(output_path)]) > 1:
+            others = [workbooks[other][0] for other in outputs[key(output_path)] if other != idx]
+            conflicts[idx] = f"output path {output_path} is also the output of {', '.join(others)}"
+    return conflicts
+
+def batch_main(argv):
+    """Handle the batch subcommand: update many workbooks against one factor table."""
+    parser = argparse.ArgumentParser(
+        prog='update_index_tjrj_3.py batch',
+        description='Update every workbook in a folder or manifest with the correction factors of one PDF'
+    )
+    parser.add_argument('pdf_path', help='PDF containing the correction factors')
+    parser.add_argument('source', help='Folder with .xlsx/.xlsm workbooks, or manifest file (excel_path[,output_path] per line)')
+    parser.add_argument('-o', '--output-dir', required=True, help='Folder for updated workbooks (manifest rows may set their own path)')
+    parser.add_argument(
+        '-m', '--mapping',
+        nargs=3,
+        action='append',
+        required=True,
+        metavar=('SHEET', 'DATE_COL', 'RATE_COL'),
+        help='Sheet name or number (1-based), date column and rate column; repeat for more tables'
+    )
+    parser.add_argument('-w', '--workers', type=int, default=1, help=f'Worker processes (default: 1, this machine has {os.cpu_count()} cores)')
+    parser.add_argument('--report', help='Also write the per-file summary to this CSV file')
+    parser.add_argument('--cache-dir', default=CACHE_DIR_DEFAULT, help=f'Factor cache directory (default: {CACHE_DIR_DEFAULT})')
+    parser.add_argument('--debug', action='store_true', help='Print the detailed log of every workbook')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.pdf_path):
+        print(f"Error: PDF file not found at {args.pdf_path}")
+        return None
+    if not os.path.exists(args.source):
+        print(f"Error: Workbook folder or manifest not found at {args.source}")
+        return None
+
+    start = time.perf_counter()
+    correction_factors = load_correction_factors(args.pdf_path, args.cache_dir, debug=args.debug)
+    if not correction_factors:
+        print("No correction factors extracted. Check the PDF format.")
+        return None
+
+    workbooks = list_workbooks(args.source, args.output_dir)
+    # Checked before any work is submitted, so clashing rows never write anything
+    conflicts = output_conflicts(workbooks)
+    results = []
+    for idx, reason in conflicts.items():
+        excel_path, output_path = workbooks[idx]
+        print(f"Error: skipping {excel_path}: {reason}")
+        results.append({'excel_path': excel_path, 'output_path': output_path, 'tables': 0, 'updated': 0,
+                         'not_found': 0, 'seconds': 0.0, 'ok': False, 'status': 'CLASH', 'log': reason})
+    if conflicts:
+        print()
+    workbooks = [pair for idx, pair in enumerate(workbooks) if idx not in conflicts]
+    os.makedirs(args.output_dir, exist_ok=True)
+    sheet_mappings = [tuple(mapping) for mapping in args.mapping]
+    print(f"Updating {len(workbooks)} workbooks with {len(correction_factors)} correction factors "
+          f"({args.workers} worker{'s' if args.workers > 1 else ''})\n")
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(correction_factors,)) as executor:
+            futures = [executor.submit(update_workbook, excel_path, output_path, sheet_mappings, None, args.debug)
+                       for excel_path, output_path in workbooks]
+            for count, future in enumerate(as_completed(futures), start=1):
+                results.append(future.result())
+                _print_workbook_result(count, len(workbooks), results[-1], args.debug)
+    else:
+        for count, (excel_path, output_path) in enumerate(workbooks, start=1):
+            results.append(update_workbook(excel_path, output_path, sheet_mappings, correction_factors, args.debug))
+            _print_workbook_result(count, len(workbooks), results[-1], args.debug)
+
+    results.sort(key=lambda result: result['excel_path'])
+    elapsed = time.perf_counter() - start
+    failed = [result for result in results if not result['ok']]
+    print("\n" + "=" * 50)
+    print("SUMMARY")
+    print("=" * 50)
+    print(f"{'workbook':<40}{'tables':>8}{'updated':>10}{'no factor':>11}{'seconds':>9}  status")
+    for result in results:
+        print(f"{os.path.basename(result['excel_path'])[:39]:<40}{result['tables']:>8}{result['updated']:>10}"
+              f"{result['not_found']:>11}{result['seconds']:>9.2f}  {result['status']}")
+    if conflicts:
+        print("CLASH: not run because its output path would overwrite an input or another row's output")
+    print(f"\n{len(results) - len(failed)} of {len(results)} workbooks updated, "
+          f"{sum(result['updated'] for result in results)} rows updated in {elapsed:.1f}s")
+
+    if args.report:
+        with open(args.report, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=['excel_path', 'output_path', 'status', 'tables', 'updated',
+                                                      'not_found', 'seconds'], extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"Report saved to {args.report}")
+    return results
+
+def _print_workbook_result(count, total, result, debug):
+    print(f"[{count}/{total}] {result['excel_path']}: {result['updated']} rows updated, "
+          f"{result['not_found']} without factors ({result['status']})")
+    if debug or not result['ok']:
+        print(result['log'])
+
 def print_usage():
     """Print script usage instructions."""
     print("\nUsage:")
@@ -240,6 +501,10 @@ def print_usage():
     print("  date_col2: (Optional) Name of the date column in the secondary table")
     print("  rate_col2: (Optional) Name of the column where rates should be inserted in the secondary table")
     print("  debug: (Optional) Add 'debug' as the last parameter to show detailed information")
+    print(f"\nFactors extracted from each PDF are cached in {CACHE_DIR_DEFAULT}; to re-extract them:")
+    print("python extract_rates.py refresh pdf_path [debug]")
+    print("\nTo update every workbook of a folder (or listed in a manifest) in parallel:")
+    print('python extract_rates.py batch "report.pdf" workbooks/ -o updated/ -m 1 "Data" "Taxa" -m 2 "Data" "Fator Corr." -w 8')
     print("\nExample:")
     print('python extract_rates.py "report.pdf" "data.xlsx" "updated.xlsx" 1 "Data" "Taxa" 2 "Data" "Fator Corr." debug')
 
@@ -251,7 +516,13 @@ if __name__ == "__main__":
     # Define default sheet mappings
     sheet_mappings = []
     
-    if arg_count >= 7:
+    if arg_count >= 3 and sys.argv[1] == "refresh":
+        # Re-extract the factors of a PDF into the cache
+        sys.exit(0 if refresh_main(sys.argv[2], debug) else 1)
+    elif arg_count >= 2 and sys.argv[1] == "batch":
+        results = batch_main(sys.argv[2:])
+        sys.exit(0 if results is not None and all(result['ok'] for result in results) else 1)
+    elif arg_count >= 7:
         pdf_path = sys.argv[1]
         excel_path = sys.argv[2]
         output_path = sys.argv[3]
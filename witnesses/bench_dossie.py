@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark da preparação das linhas em dossie_testemunhas.py.
+
+Compara o caminho célula a célula (iterrows + pegar/dividir_linhas/formatar_data)
+com preparar_linhas, que normaliza o DataFrame inteiro de uma vez, numa planilha
+sintética (10.000 linhas por padrão) montada a partir de testemunhas.xlsx.
+
+Uso: python bench_dossie.py [--linhas N] [--excel testemunhas.xlsx] [--gerar N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from dossie_testemunhas import (CAMPOS_LISTA, COLS, INPUT_XLSX_DEFAULT, construir_doc_modelo,
+                                dividir_linhas, pegar, preparar_linhas)
+
+
+def planilha_sintetica(excel, n_linhas):
+    """Repete as linhas do Excel de exemplo variando nomes, datas e processos, com algumas células vazias."""
+    base = pd.read_excel(excel)
+    base.columns = [c.strip() for c in base.columns]
+    df = base.iloc[[i % len(base) for i in range(n_linhas)]].reset_index(drop=True)
+    df[COLS["NomeTestemunha"]] = [f"{nome} {i}" for i, nome in enumerate(df[COLS["NomeTestemunha"]])]
+    df[COLS["DataAudiencia"]] = [f"2025-11-{i % 28 + 1:02d}" for i in range(n_linhas)]
+    df[COLS["Processo"]] = [f"{i % 500:07d}-56.2023.5.02.0001" for i in range(n_linhas)]
+    df.loc[df.index % 7 == 0, COLS["Etiquetas"]] = None
+    df.loc[df.index % 11 == 0, COLS["PontosCriticos"]] = None
+    return df
+
+
+def preparar_por_celula(df):
+    """Caminho antigo: uma Series por linha e pegar/dividir_linhas em cada célula."""
+    registros = []
+    for _, r in df.iterrows():
+        linha = r.to_dict()
+        registros.append({
+            chave: dividir_linhas(linha.get(chave, "")) if chave in CAMPOS_LISTA else pegar(linha, chave)
+            for chave in COLS.values()
+        })
+    return registros
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a preparação célula a célula com preparar_linhas")
+    parser.add_argument("--linhas", type=int, default=10_000, help="Linhas da planilha sintética (padrão: 10000)")
+    parser.add_argument("--excel", default=INPUT_XLSX_DEFAULT, help=f"Excel de exemplo (padrão: {INPUT_XLSX_DEFAULT})")
+    parser.add_argument("--gerar", type=int, default=0,
+                        help="Também gera esta quantidade de dossiês (--modelo) para comparar com o custo da preparação")
+    args = parser.parse_args()
+
+    df = planilha_sintetica(args.excel, args.linhas)
+    print(f"Planilha sintética: {len(df)} linhas, {len(df.columns)} colunas\n")
+
+    t_celula, por_celula = cronometrar(preparar_por_celula, df)
+    t_vetor, vetorizado = cronometrar(preparar_linhas, df)
+    print(f"célula a célula:  {t_celula:.2f}s ({t_celula / len(df) * 1e6:.0f} µs/linha)")
+    print(f"preparar_linhas:  {t_vetor:.2f}s ({t_vetor / len(df) * 1e6:.0f} µs/linha)")
+    print(f"\nGanho: {t_celula / t_vetor:.1f}x, registros idênticos: {por_celula == vetorizado}")
+
+    if args.gerar:
+        with tempfile.TemporaryDirectory() as pasta:
+            inicio = time.perf_counter()
+            for i, linha in enumerate(vetorizado[:args.gerar]):
+                construir_doc_modelo(linha, os.path.join(pasta, f"{i}.docx"))
+            t_gerar = (time.perf_counter() - inicio) / min(args.gerar, len(vetorizado))
+        print(f"Geração (--modelo): {t_gerar * 1e3:.1f} ms/dossiê")
+
+
+if __name__ == "__main__":
+    main()
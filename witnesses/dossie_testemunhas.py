@@ -7,14 +7,28 @@ Mudanças solicitadas:
 - Renomeado: DocumentosOuExibicoes -> Provas
 
 Requer: pandas, python-docx
+
+Uso: python dossie_testemunhas.py [arquivo_excel] [pasta_saida] [--workers N] [--modelo] [--incremental]
+                                  [--agrupar {DataAudiencia,Processo}] [--formato-pacote {docx,zip}]
 """
 
+import argparse
+import hashlib
+import io
+import json
 import os
 import re
 import sys
+import time
+import zipfile
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 from datetime import datetime
+from functools import partial
 from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 from docx.shared import Inches, Pt
 from docx.oxml.shared import OxmlElement, qn
 
@@ -27,8 +41,12 @@ TAMANHO_TITULO = 14
 MARGENS_POL = 0.75                       # 0.75 polegadas ~ 19 mm
 LINHAS_ANOTACOES = 15                    # número de linhas no bloco de anotações
 ALTURA_LINHA_ANOTACOES = 0.4             # altura de cada linha em polegadas
+VERSAO_LAYOUT = 1                        # incremente ao mudar o layout, para regenerar tudo com --incremental
 # -------------------------------------
 
+# Manifesto salvo ao lado da pasta de saída (ex.: dossies.manifesto.json)
+MANIFESTO_SUFIXO = ".manifesto.json"
+
 # Nomes de colunas esperados no Excel (português) após as mudanças
 COLS = {
     "NomeTestemunha": "NomeTestemunha",
@@ -56,6 +74,9 @@ CAMPOS_LISTA = [
     COLS["TestemunhosAnteriores"],
 ]
 
+# Separador dos itens nos campos com múltiplas linhas
+PADRAO_LISTA = re.compile(r'(?:\r?\n|;)')
+
 # Cabeçalho (duas colunas)
 CABECALHO_ESQ = [
     ("TESTEMUNHA", COLS["NomeTestemunha"]),
@@ -75,7 +96,7 @@ def dividir_linhas(valor):
     txt = str(valor).strip()
     if not txt:
         return []
-    partes = re.split(r'(?:\r?\n|;)', txt)
+    partes = PADRAO_LISTA.split(txt)
     return [p.strip() for p in partes if p.strip()]
 
 def ajustar_margens(section, polegadas):
@@ -102,23 +123,21 @@ def adiciona_bullets(doc, itens):
         p.style = doc.styles['List Bullet']
         p.paragraph_format.space_after = Pt(2)
 
-def adiciona_perguntas_como_lista(doc, perguntas_texto):
-    """Formata perguntas como itens de lista numerada ou com bullets."""
-    if not perguntas_texto or pd.isna(perguntas_texto):
-        return
-    
-    # Divide o texto em linhas individuais
-    linhas = dividir_linhas(perguntas_texto)
-    if not linhas:
+def adiciona_perguntas_como_lista(doc, perguntas):
+    """Formata perguntas (já separadas por preparar_linhas) como itens de lista com bullets."""
+    if not perguntas:
         return
     
     # Adiciona cada pergunta como um item de lista
-    for pergunta in linhas:
+    for pergunta in perguntas:
         if pergunta.strip():  # Só adiciona se não for vazia
             p = doc.add_paragraph(pergunta.strip(), style=None)
             p.style = doc.styles['List Bullet']
             p.paragraph_format.space_after = Pt(2)
 
+# Elemento <w:tblBorders> já montado para cada cor; as tabelas recebem cópias
+_BORDAS = {}
+
 def bordas_tabela(tbl, cor="C0C0C0"):
     """Aplica bordas leves na tabela."""
     _tbl = tbl._tbl
@@ -126,15 +145,17 @@ def bordas_tabela(tbl, cor="C0C0C0"):
     if tblPr is None:
         tblPr = OxmlElement('w:tblPr')
         _tbl.append(tblPr)
-    tblBorders = OxmlElement('w:tblBorders')
-    for edge in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'):
-        tag = OxmlElement(f'w:{edge}')
-        tag.set(qn('w:val'), 'single')
-        tag.set(qn('w:sz'), '4')
-        tag.set(qn('w:space'), '0')
-        tag.set(qn('w:color'), cor)
-        tblBorders.append(tag)
-    tblPr.append(tblBorders)
+    if cor not in _BORDAS:
+        tblBorders = OxmlElement('w:tblBorders')
+        for edge in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'):
+            tag = OxmlElement(f'w:{edge}')
+            tag.set(qn('w:val'), 'single')
+            tag.set(qn('w:sz'), '4')
+            tag.set(qn('w:space'), '0')
+            tag.set(qn('w:color'), cor)
+            tblBorders.append(tag)
+        _BORDAS[cor] = tblBorders
+    tblPr.append(deepcopy(_BORDAS[cor]))
 
 def adiciona_cabecalho(doc, linha):
     tbl = doc.add_table(rows=1, cols=2)
@@ -145,7 +166,7 @@ def adiciona_cabecalho(doc, linha):
     cel_dir = tbl.cell(0, 1)
 
     # Nome grande no topo-esquerda
-    nome = pegar(linha, COLS["NomeTestemunha"])
+    nome = linha[COLS["NomeTestemunha"]]
     p_nome = cel_esq.paragraphs[0]
     p_nome.clear()
     r = p_nome.add_run(nome)
@@ -154,7 +175,7 @@ def adiciona_cabecalho(doc, linha):
 
     # Bloco esquerdo
     for rotulo, chave in CABECALHO_ESQ[1:]:  # já usamos o nome como 1ª linha
-        valor = pegar(linha, chave)
+        valor = linha[chave]
         pr = cel_esq.add_paragraph()
         run = pr.add_run(f"{rotulo}: ")
         run.bold = True
@@ -162,7 +183,7 @@ def adiciona_cabecalho(doc, linha):
 
     # Bloco direito
     for rotulo, chave in CABECALHO_DIR:
-        valor = pegar(linha, chave)
+        valor = linha[chave]
         pr = cel_dir.add_paragraph()
         run = pr.add_run(f"{rotulo}: ")
         run.bold = True
@@ -202,11 +223,49 @@ def pegar(linha_dict, chave, default=""):
         pass
     return str(v).strip()
 
+def _texto(serie):
+    """Coluna inteira como texto sem espaços nas pontas, "" onde não há valor (pegar, vetorizado)."""
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+        texto = serie.astype(str)
+    else:
+        texto = serie.map(str)  # números e datas fora de DataAudiencia: mesmo str() de pegar
+    return texto.str.strip().where(serie.notna(), "")
+
+def preparar_linhas(df):
+    """Normaliza o Excel inteiro de uma vez e devolve um registro (dict) por linha, com
+    os valores prontos para o dossiê: texto limpo nos campos simples, DataAudiencia
+    como AAAA-MM-DD e listas de itens nos CAMPOS_LISTA. Colunas ausentes ficam vazias.
+    Faz o mesmo que pegar/dividir_linhas célula a célula, mas por coluna: as datas
+    distintas são convertidas uma vez só e as listas saem de um único str.split."""
+    colunas = {}
+    for chave in COLS.values():
+        if chave not in df.columns:
+            colunas[chave] = [[] if chave in CAMPOS_LISTA else ""] * len(df)
+            continue
+        serie = df[chave]
+        if chave == COLS["DataAudiencia"]:
+            if pd.api.types.is_datetime64_any_dtype(serie):
+                datas = serie.dt.strftime("%Y-%m-%d")
+            else:
+                datas = serie.map({valor: formatar_data(valor) for valor in serie.dropna().unique()})
+            colunas[chave] = datas.where(serie.notna(), "").tolist()
+        elif chave in CAMPOS_LISTA:
+            partes = _texto(serie).str.split(PADRAO_LISTA)
+            colunas[chave] = [[p.strip() for p in itens if p.strip()] for itens in partes]
+        else:
+            colunas[chave] = _texto(serie).tolist()
+    chaves = list(colunas)
+    return [dict(zip(chaves, valores)) for valores in zip(*colunas.values())]
+
 def construir_doc(linha, caminho_saida):
     doc = Document()
     estilo_default(doc)
     ajustar_margens(doc.sections[0], MARGENS_POL)
+    preencher_doc(doc, linha)
+    doc.save(caminho_saida)
 
+def preencher_doc(doc, linha):
+    """Acrescenta ao fim de doc o dossiê de uma testemunha (registro de preparar_linhas)."""
     # Cabeçalho
     adiciona_cabecalho(doc, linha)
 
@@ -219,14 +278,14 @@ def construir_doc(linha, caminho_saida):
         ("Testemunhos anteriores", COLS["TestemunhosAnteriores"]),
     ]
     for titulo, chave in secoes:
-        itens = dividir_linhas(linha.get(chave, ""))
+        itens = linha[chave]
         if itens:
             adiciona_titulo(doc, titulo)
             adiciona_bullets(doc, itens)
     
     # Seção especial para perguntas preparadas (como lista)
-    perguntas = linha.get(COLS["PerguntasPreparadas"], "")
-    if perguntas and not pd.isna(perguntas) and str(perguntas).strip():
+    perguntas = linha[COLS["PerguntasPreparadas"]]
+    if perguntas:
         adiciona_titulo(doc, "Perguntas preparadas")
         adiciona_perguntas_como_lista(doc, perguntas)
 
@@ -234,19 +293,295 @@ def construir_doc(linha, caminho_saida):
     adiciona_bloco_anotacoes(doc, linhas=LINHAS_ANOTACOES, altura_linha=ALTURA_LINHA_ANOTACOES)
 
     # Rodapé: etiquetas
-    etiquetas = pegar(linha, COLS["Etiquetas"])
+    etiquetas = linha[COLS["Etiquetas"]]
+    if etiquetas:
+        p = doc.add_paragraph()
+        p.paragraph_format.space_before = Pt(8)
+        run = p.add_run(f"Etiquetas: {etiquetas}")
+        run.italic = True
+
+# Modelo montado uma vez por processo por carregar_modelo(): (documento reaproveitado,
+# elementos do esqueleto, protótipo de título, protótipo de bullet)
+_MODELO = None
+
+def carregar_modelo():
+    """Monta (uma única vez) o esqueleto comum a todos os dossiês: estilos, margens,
+    tabela do cabeçalho com os rótulos, bloco de anotações e parágrafos-protótipo
+    de título e de bullet, que cada dossiê só copia e preenche."""
+    global _MODELO
+    if _MODELO is None:
+        doc = Document()
+        estilo_default(doc)
+        ajustar_margens(doc.sections[0], MARGENS_POL)
+        adiciona_cabecalho(doc, {chave: "" for chave in COLS.values()})
+        titulo = adiciona_titulo(doc, "")._p
+        adiciona_bullets(doc, [""])
+        bullet = doc.paragraphs[-1]._p
+        adiciona_bloco_anotacoes(doc, linhas=LINHAS_ANOTACOES, altura_linha=ALTURA_LINHA_ANOTACOES)
+        corpo = doc.element.body
+        corpo.remove(titulo)
+        corpo.remove(bullet)
+        esqueleto = [el for el in corpo if el is not corpo.sectPr]
+        _MODELO = (doc, esqueleto, titulo, bullet)
+    return _MODELO
+
+def construir_doc_modelo(linha, caminho_saida):
+    """Mesmo documento de construir_doc, a partir do modelo de carregar_modelo():
+    o corpo do documento é trocado por uma cópia do esqueleto e só os campos
+    variáveis são preenchidos, sem recriar estilos, tabelas e bordas."""
+    preencher_modelo(linha).save(caminho_saida)
+
+def preencher_modelo(linha):
+    """Preenche o documento do modelo com o dossiê de uma testemunha e o devolve."""
+    doc, esqueleto, proto_titulo, proto_bullet = carregar_modelo()
+    corpo = doc.element.body
+    for el in [el for el in corpo if el is not corpo.sectPr]:
+        corpo.remove(el)
+    for el in esqueleto:
+        corpo.sectPr.addprevious(deepcopy(el))
+    tbl_cabecalho, anotacoes = corpo[0], corpo[1]
+
+    # Cabeçalho: nome e valores ao lado dos rótulos já presentes no modelo
+    tbl = Table(tbl_cabecalho, doc._body)
+    paragrafos_esq = tbl.cell(0, 0).paragraphs
+    paragrafos_dir = tbl.cell(0, 1).paragraphs
+    paragrafos_esq[0].runs[0].text = linha[COLS["NomeTestemunha"]]
+    for p, (_, chave) in zip(paragrafos_esq[1:], CABECALHO_ESQ[1:]):
+        p.runs[1].text = linha[chave]
+    for p, (_, chave) in zip(paragrafos_dir[1:], CABECALHO_DIR):
+        p.runs[1].text = linha[chave]
+
+    def titulo(texto):
+        el = deepcopy(proto_titulo)
+        anotacoes.addprevious(el)
+        Paragraph(el, doc._body).runs[0].text = texto.upper()
+
+    def bullets(itens):
+        for item in itens:
+            el = deepcopy(proto_bullet)
+            anotacoes.addprevious(el)
+            Paragraph(el, doc._body).add_run(item)
+
+    # Seções na mesma ordem de construir_doc, antes do bloco de anotações
+    secoes = [
+        ("Fatos-chave", COLS["FatosChave"]),
+        ("Estratégia", COLS["Estrategia"]),
+        ("Pontos críticos / Impeachment", COLS["PontosCriticos"]),
+        ("Provas", COLS["Provas"]),
+        ("Testemunhos anteriores", COLS["TestemunhosAnteriores"]),
+    ]
+    for texto, chave in secoes:
+        itens = linha[chave]
+        if itens:
+            titulo(texto)
+            bullets(itens)
+
+    perguntas = linha[COLS["PerguntasPreparadas"]]
+    if perguntas:
+        titulo("Perguntas preparadas")
+        bullets(perguntas)
+
+    # Rodapé: etiquetas
+    etiquetas = linha[COLS["Etiquetas"]]
     if etiquetas:
         p = doc.add_paragraph()
         p.paragraph_format.space_before = Pt(8)
         run = p.add_run(f"Etiquetas: {etiquetas}")
         run.italic = True
 
+    return doc
+
+def construir_pacote(itens, caminho_saida, usar_modelo=False):
+    """Grava vários dossiês num único arquivo, para poupar idas e voltas ao disco de rede.
+    itens: lista de (linha, nome do .docx individual).
+    .zip: cada dossiê é gerado em memória e gravado em sequência no zip (sem compressão,
+    o .docx já é comprimido), um de cada vez.
+    .docx: um só documento, com uma quebra de página entre as testemunhas."""
+    if caminho_saida.endswith(".zip"):
+        with zipfile.ZipFile(caminho_saida, "w", zipfile.ZIP_STORED) as zf:
+            for linha, nome in itens:
+                buffer = io.BytesIO()
+                if usar_modelo:
+                    construir_doc_modelo(linha, buffer)
+                else:
+                    construir_doc(linha, buffer)
+                zf.writestr(nome, buffer.getvalue())
+        return
+
+    doc = Document()
+    estilo_default(doc)
+    ajustar_margens(doc.sections[0], MARGENS_POL)
+    corpo = doc.element.body
+    for n, (linha, _) in enumerate(itens):
+        if n:
+            doc.add_page_break()
+        if usar_modelo:
+            # Move o corpo preenchido do modelo; ele é refeito a partir do esqueleto no próximo uso
+            corpo_modelo = preencher_modelo(linha).element.body
+            for el in [el for el in corpo_modelo if el is not corpo_modelo.sectPr]:
+                corpo.sectPr.addprevious(el)
+        else:
+            preencher_doc(doc, linha)
     doc.save(caminho_saida)
 
+def nome_dossie(linha, i):
+    """Nome do .docx da testemunha da linha i (0 = primeira linha de dados do Excel)."""
+    nome = linha[COLS["NomeTestemunha"]] or f"Testemunha_{i+1}"
+    nome_seguro = re.sub(r'[^A-Za-z0-9._ -À-ÿ]+', '_', nome).strip()
+    return f"{nome_seguro}.docx"
+
+def preparar_tarefas(registros, saida_dir):
+    """Lista (registro, caminho de saída) de cada dossiê a gerar, na ordem do Excel.
+    Testemunhas com o mesmo nome gerariam o mesmo arquivo: fica a última linha,
+    como acontecia quando uma sobrescrevia a outra."""
+    tarefas = {}
+    for i, linha in enumerate(registros):
+        saida = os.path.join(saida_dir, nome_dossie(linha, i))
+        if saida in tarefas:
+            print(f"Aviso: nome repetido, {saida} terá os dados da linha {i+2} do Excel")
+        tarefas[saida] = linha
+    return [(linha, saida) for saida, linha in tarefas.items()]
+
+def agrupar_tarefas(registros, chave, saida_dir, formato="docx"):
+    """Junta todas as linhas do Excel por valor de chave (DataAudiencia ou Processo), na
+    ordem em que aparecem: devolve [(lista de (linha, nome do .docx), caminho do pacote)].
+    Nenhuma linha é descartada: a mesma testemunha pode estar em vários processos ou
+    datas. Só dentro de um .zip nomes repetidos colidiriam; ganham um sufixo " (2)", " (3)"..."""
+    grupos = {}
+    for i, linha in enumerate(registros):
+        valor = linha[chave] or "sem_valor"
+        valor_seguro = re.sub(r'[^A-Za-z0-9._ -À-ÿ]+', '_', valor).strip()
+        pacote = os.path.join(saida_dir, f"{chave}_{valor_seguro}.{formato}")
+        itens = grupos.setdefault(pacote, [])
+        nome = nome_dossie(linha, i)
+        if formato == "zip":
+            usados = {n for _, n in itens}
+            base, n = nome[:-len(".docx")], 2
+            while nome in usados:
+                nome = f"{base} ({n}).docx"
+                n += 1
+            if n > 2:
+                print(f"Aviso: nome repetido em {pacote}, linha {i+2} do Excel gravada como {nome}")
+        itens.append((linha, nome))
+    return [(itens, pacote) for pacote, itens in grupos.items()]
+
+def caminho_manifesto(saida_dir):
+    return os.path.normpath(saida_dir) + MANIFESTO_SUFIXO
+
+def modo_geracao(agrupar=None, formato_pacote="docx"):
+    """Modo gravado no manifesto: dossiês individuais ou pacotes por chave e formato."""
+    return {"agrupar": agrupar, "formato_pacote": formato_pacote if agrupar else None}
+
+def carregar_manifesto(caminho):
+    """Lê o manifesto e devolve (modo, {arquivo do dossiê: hash}); vazio se não existir ou
+    estiver corrompido. O modo é None em manifestos de versões que não o gravavam."""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    if not isinstance(dados, dict):
+        return None, {}
+    if isinstance(dados.get("arquivos"), dict):
+        return dados.get("modo"), dados["arquivos"]
+    return None, dados
+
+def salvar_manifesto(caminho, manifesto, modo):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"modo": modo, "arquivos": manifesto}, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporario, caminho)  # não deixa manifesto pela metade se o processo cair
+
+def hash_linha(linha):
+    """Hash do conteúdo que vai para o dossiê (colunas usadas, já normalizadas)
+    e da configuração do gerador; muda se qualquer um dos dois mudar."""
+    conteudo = {
+        "config": [FONTE, TAMANHO_FONTE, TAMANHO_TITULO, MARGENS_POL,
+                   LINHAS_ANOTACOES, ALTURA_LINHA_ANOTACOES, VERSAO_LAYOUT],
+        "campos": linha,
+    }
+    texto = json.dumps(conteudo, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def hash_tarefa(conteudo):
+    """hash_linha de um dossiê ou, para um pacote (lista de (linha, nome)), hash dos hashes de seus dossiês."""
+    if isinstance(conteudo, list):
+        texto = "".join(f"{nome}:{hash_linha(linha)}\n" for linha, nome in conteudo)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+    return hash_linha(conteudo)
+
+def _gerar(tarefa, usar_modelo=False):
+    """Gera um dossiê ou um pacote (conteúdo em lista); devolve (caminho, mensagem de erro ou None).
+    Roda nos processos do pool."""
+    linha, saida = tarefa
+    try:
+        if isinstance(linha, list):
+            construir_pacote(linha, saida, usar_modelo)
+        elif usar_modelo:
+            construir_doc_modelo(linha, saida)
+        else:
+            construir_doc(linha, saida)
+        return saida, None
+    except Exception as e:
+        return saida, str(e)
+
+def barra_progresso(feitos, total, largura=30):
+    cheios = largura * feitos // total if total else largura
+    print(f"\r[{'#' * cheios}{'.' * (largura - cheios)}] {feitos}/{total}", end="", flush=True)
+
+def gerar_dossies(tarefas, workers=1, usar_modelo=False):
+    """Gera os dossiês em série ou, com workers > 1, num pool de processos.
+    As linhas vão para os processos em lotes (chunksize) para diluir o custo de
+    envio; os arquivos gerados são os mesmos do modo serial. Com usar_modelo,
+    cada processo monta o modelo uma vez e gera os dossiês a partir dele.
+    Devolve a lista de (caminho, erro) das falhas."""
+    falhas = []
+    gerar = partial(_gerar, usar_modelo=usar_modelo)
+    if workers > 1:
+        lote = max(1, len(tarefas) // (workers * 4))
+        executor = ProcessPoolExecutor(max_workers=workers)
+        resultados = executor.map(gerar, tarefas, chunksize=lote)
+    else:
+        executor = None
+        resultados = map(gerar, tarefas)
+
+    for feitos, (saida, erro) in enumerate(resultados, start=1):
+        if erro is not None:
+            falhas.append((saida, erro))
+        if workers > 1:
+            barra_progresso(feitos, len(tarefas))
+        else:
+            print(f"✓ {saida}" if erro is None else f"✗ {saida}: {erro}")
+
+    if executor is not None:
+        executor.shutdown()
+        print()
+        for saida, erro in falhas:
+            print(f"✗ {saida}: {erro}")
+    return falhas
+
 def main():
     # Aceita argumentos da linha de comando
-    input_xlsx = sys.argv[1] if len(sys.argv) > 1 else INPUT_XLSX_DEFAULT
-    saida_dir = sys.argv[2] if len(sys.argv) > 2 else SAIDA_DIR_DEFAULT
+    parser = argparse.ArgumentParser(description="Gera dossiês de testemunhas (DOCX) a partir de um Excel")
+    parser.add_argument("input_xlsx", nargs="?", default=INPUT_XLSX_DEFAULT,
+                        help=f"Excel com as testemunhas (padrão: {INPUT_XLSX_DEFAULT})")
+    parser.add_argument("saida_dir", nargs="?", default=SAIDA_DIR_DEFAULT,
+                        help=f"Pasta de saída dos .docx (padrão: {SAIDA_DIR_DEFAULT})")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help=f"Processos gerando dossiês em paralelo (padrão: 1; esta máquina tem {os.cpu_count()} núcleos)")
+    parser.add_argument("--modelo", action="store_true",
+                        help="Monta o esqueleto do dossiê uma vez e só preenche os campos de cada testemunha (mais rápido)")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"Só regenera testemunhas alteradas desde a última execução e apaga os dossiês de "
+                             f"linhas removidas (usa o manifesto <pasta_saida>{MANIFESTO_SUFIXO})")
+    parser.add_argument("--agrupar", choices=[COLS["DataAudiencia"], COLS["Processo"]],
+                        help="Grava todos os dossiês de uma mesma data de audiência ou processo num só arquivo")
+    parser.add_argument("--formato-pacote", choices=["docx", "zip"], default="docx",
+                        help="Com --agrupar: um .docx com quebra de página entre testemunhas ou um .zip "
+                             "com um .docx por testemunha (padrão: docx)")
+    args = parser.parse_args()
+    input_xlsx = args.input_xlsx
+    saida_dir = args.saida_dir
     
     # Lembrete sobre delimitadores
     print("\n⚠️  LEMBRETE: Use ponto e vírgula (;) para separar itens em listas no Excel.")
@@ -258,16 +593,58 @@ def main():
         sys.exit(1)
     
     os.makedirs(saida_dir, exist_ok=True)
+    inicio = time.perf_counter()
     df = pd.read_excel(input_xlsx)
     df.columns = [c.strip() for c in df.columns]
+    registros = preparar_linhas(df)
+    if args.agrupar:
+        # Agrupa as linhas originais: preparar_tarefas descartaria testemunhas repetidas entre pacotes
+        tarefas = agrupar_tarefas(registros, args.agrupar, saida_dir, args.formato_pacote)
+        unidade = "pacotes"
+    else:
+        tarefas = preparar_tarefas(registros, saida_dir)
+        unidade = "dossiês"
+    leitura = time.perf_counter() - inicio
 
-    for i, r in df.iterrows():
-        linha = r.to_dict()
-        nome = pegar(linha, COLS["NomeTestemunha"]) or f"Testemunha_{i+1}"
-        nome_seguro = re.sub(r'[^A-Za-z0-9._ -À-ÿ]+', '_', nome).strip()
-        saida = os.path.join(saida_dir, f"{nome_seguro}.docx")
-        construir_doc(linha, saida)
-        print(f"✓ {saida}")
+    # O manifesto guarda o hash de cada dossiê gerado, para a próxima execução --incremental
+    manifesto_path = caminho_manifesto(saida_dir)
+    modo = modo_geracao(args.agrupar, args.formato_pacote)
+    modo_anterior, anterior = carregar_manifesto(manifesto_path)
+    hashes = {os.path.basename(saida): hash_tarefa(conteudo) for conteudo, saida in tarefas}
+    removidos = []
+    if args.incremental:
+        if anterior and modo_anterior != modo:
+            # Os arquivos do manifesto são de outro modo (dossiês x pacotes): não dá para saber
+            # quais linhas saíram do Excel, então tudo é gerado de novo e nada é apagado
+            print(f"Aviso: a última execução em {saida_dir} usou outro modo de geração (--agrupar/--formato-pacote); "
+                  f"todos os {unidade} serão gerados de novo e os arquivos anteriores ficam na pasta")
+            anterior = {}
+        pendentes = [(linha, saida) for linha, saida in tarefas
+                     if anterior.get(os.path.basename(saida)) != hashes[os.path.basename(saida)]
+                     or not os.path.exists(saida)]
+        for arquivo in sorted(set(anterior) - set(hashes)):
+            caminho = os.path.join(saida_dir, arquivo)
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            removidos.append(arquivo)
+            print(f"- {caminho} (não está mais no Excel)")
+    else:
+        pendentes = tarefas
+
+    falhas = gerar_dossies(pendentes, args.workers, args.modelo)
+    for saida, _ in falhas:
+        hashes.pop(os.path.basename(saida))  # sem hash, é tentado de novo na próxima execução
+    salvar_manifesto(manifesto_path, hashes, modo)
+    total = time.perf_counter() - inicio
+
+    gerados = len(pendentes) - len(falhas)
+    print(f"\n{gerados} {unidade} gerados em {saida_dir}" + (f", {len(falhas)} com erro" if falhas else ""))
+    if args.incremental:
+        print(f"{len(tarefas) - len(pendentes)} sem alteração, {len(removidos)} removido(s)")
+    print(f"Tempo: {total:.1f}s (leitura do Excel {leitura:.1f}s, geração {total - leitura:.1f}s, "
+          f"{gerados / max(total - leitura, 1e-9):.1f} {unidade}/s, {args.workers} processo(s))")
+    if falhas:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()